@@ -0,0 +1,40 @@
+"""Unit tests for umierrorcorrect.downsampling module."""
+
+import numpy as np
+from umierrorcorrect.downsampling import downsample_reads_per_region
+from umierrorcorrect.get_consensus_statistics import RegionConsensusStats
+
+
+def _region_stats(name="gene1"):
+    fsizes = [1, 2, 3, 5]
+    stat = RegionConsensusStats("1", "chr1:100-200", name, 3, fsizes)
+    stat.add_family_sizes([10, 5, 3, 2], fsizes)
+    return stat
+
+
+class TestDownsampleReadsPerRegion:
+    """Tests for downsample_reads_per_region function."""
+
+    def test_full_rate_keeps_all_reads(self):
+        """Sampling all reads reproduces the original statistics."""
+        stat = _region_stats()
+        results = downsample_reads_per_region([stat], [1.0], stat.fsizes, rng=np.random.default_rng(0))
+
+        assert results[0][1.0].total_reads == stat.total_reads
+        assert results[0][1.0].umis == stat.umis
+
+    def test_sample_size_is_exact(self):
+        """Each rate draws exactly round(rate * reads) reads."""
+        stat = _region_stats()
+        rates = [0.1, 0.5, 0.7]
+        results = downsample_reads_per_region([stat], rates, stat.fsizes, rng=np.random.default_rng(1))
+
+        for rate in rates:
+            assert results[0][rate].total_reads[0] == round(rate * stat.total_reads[0])
+
+    def test_only_named_regions(self):
+        """Unnamed regions are skipped unless onlyNamed is False."""
+        stats = [_region_stats(), _region_stats(name="")]
+
+        assert len(downsample_reads_per_region(stats, [0.5], stats[0].fsizes)) == 1
+        assert len(downsample_reads_per_region(stats, [0.5], stats[0].fsizes, onlyNamed=False)) == 2
@@ -7,6 +7,7 @@ from umierrorcorrect.get_consensus_statistics import (
     calculate_target_coverage,
     get_overall_statistics,
     parse_consensus_read_name,
+    run_get_consensus_statistics,
 )
 
 
@@ -82,7 +83,7 @@ class TestRegionConsensusStats:
     def test_add_family_sizes_extends_list(self):
         """Test that family sizes are added to the list."""
         fsizes = [1, 2, 3]
-        stat = RegionConsensusStats("1", "chr1:100-200", "", 0, fsizes)
+        stat = RegionConsensusStats("1", "chr1:100-200", "", 0, fsizes, store_family_sizes=True)
 
         stat.add_family_sizes([5, 3], fsizes)
         assert stat.family_sizes == [5, 3]
@@ -90,6 +91,53 @@ class TestRegionConsensusStats:
         stat.add_family_sizes([2, 1], fsizes)
         assert stat.family_sizes == [5, 3, 2, 1]
 
+    def test_add_family_sizes_histogram(self):
+        """Test that only the histogram is kept unless family sizes are stored."""
+        fsizes = [1, 2, 3]
+        stat = RegionConsensusStats("1", "chr1:100-200", "", 0, fsizes)
+
+        stat.add_family_sizes([3, 2], fsizes)
+        stat.add_family_sizes([5, 3], fsizes)
+
+        assert stat.family_sizes == []
+        assert stat.family_size_counts.tolist() == [0, 0, 1, 2, 0, 1]
+        assert stat.num_families == 4
+
+    def test_reverse_cum(self):
+        """Test families and reads at or above each family size."""
+        fsizes = [1, 2, 3]
+        stat = RegionConsensusStats("1", "chr1:100-200", "", 0, fsizes)
+        stat.add_family_sizes([3, 2], fsizes)
+
+        families, reads = stat.reverse_cum
+        assert families.tolist() == [2, 2, 2, 1, 0]
+        assert reads.tolist() == [5, 5, 5, 3, 0]
+
+        # the cache is refreshed when more families are added
+        stat.add_family_sizes([5], fsizes)
+        families, reads = stat.reverse_cum
+        assert families.tolist() == [3, 3, 3, 2, 1, 1, 0]
+        assert reads.tolist() == [10, 10, 10, 8, 5, 5, 0]
+
+    def test_add_family_sizes_empty(self):
+        """Adding no families leaves the statistics unchanged."""
+        fsizes = [1, 2, 3]
+        stat = RegionConsensusStats("1", "chr1:100-200", "", 2, fsizes)
+        stat.add_family_sizes([], fsizes)
+
+        assert stat.total_reads == {0: 2, 1: 2, 2: 0, 3: 0}
+        assert stat.umis == {0: 2, 1: 2, 2: 0, 3: 0}
+
+    def test_count_arrays_aligned_with_thresholds(self):
+        """Test that the count arrays follow the threshold order."""
+        fsizes = [1, 3, 5]
+        stat = RegionConsensusStats("1", "chr1:100-200", "", 0, fsizes)
+        stat.add_family_sizes([5, 3, 1], fsizes)
+
+        assert stat.thresholds == (0, 1, 3, 5)
+        assert stat.read_counts.tolist() == [9, 9, 8, 5]
+        assert stat.umi_counts.tolist() == [9, 3, 2, 1]
+
     def test_add_family_sizes_multiple_calls(self):
         """Test that multiple add_family_sizes calls accumulate correctly."""
         fsizes = [1, 2, 3]
@@ -215,6 +263,18 @@ class TestGetOverallStatistics:
         assert overall.pos == "all_regions"
         assert overall.name == ""
 
+    def test_regions_with_different_fsizes_order(self):
+        """Counts are matched by threshold, not by column, when regions order fsizes differently."""
+        stat1 = RegionConsensusStats("1", "chr1:100-200", "gene1", 0, [1, 2, 3])
+        stat1.add_family_sizes([5, 3], [1, 2, 3])
+        stat2 = RegionConsensusStats("2", "chr1:300-400", "gene2", 0, [3, 2, 1])
+        stat2.add_family_sizes([4, 2], [3, 2, 1])
+
+        overall = get_overall_statistics([stat1, stat2], [1, 2, 3])
+
+        assert overall.umis == {0: 14, 1: 4, 2: 4, 3: 3}
+        assert overall.total_reads == {0: 14, 1: 14, 2: 14, 3: 12}
+
     def test_empty_regions(self):
         """Test with empty region list."""
         overall = get_overall_statistics([])
@@ -321,7 +381,7 @@ class TestRegionConsensusStatsFromRegionStats:
         assert stat.pos == "chr1:100-200"
         assert stat.name == "gene1"
         assert stat.singletons == 2
-        assert stat.family_sizes == [5, 3]
+        assert stat.family_size_counts.tolist() == [0, 0, 0, 1, 0, 1]
 
     def test_from_region_stats_counts(self):
         """Test that counts are calculated correctly."""
@@ -340,3 +400,26 @@ class TestRegionConsensusStatsFromRegionStats:
         # At threshold 3: families [5,3] pass = 8 reads
         assert stat.total_reads[3] == 8
         assert stat.umis[3] == 2
+
+
+class TestRunGetConsensusStatistics:
+    """Tests for run_get_consensus_statistics function."""
+
+    def test_output_raw_group_counts(self, tmp_path):
+        """Test that raw group counts combine family sizes and singletons over regions."""
+        fsizes = list(DEFAULT_FAMILY_SIZES)[1:]
+        hist = [
+            RegionConsensusStats.from_region_stats(
+                RegionStats(chrom="chr1", start=100, end=200, consensus_counts=[5, 3, 3], singleton_count=2),
+                fsizes,
+            ),
+            RegionConsensusStats.from_region_stats(
+                RegionStats(chrom="chr2", start=100, end=200, consensus_counts=[2], singleton_count=1),
+                fsizes,
+            ),
+        ]
+
+        run_get_consensus_statistics(str(tmp_path), "sample_consensus_reads.bam", None, True, "sample", hist=hist)
+
+        lines = (tmp_path / "sample_consensus_group_counts.txt").read_text().splitlines()
+        assert lines == ["1\t3", "2\t1", "3\t2", "5\t1"]
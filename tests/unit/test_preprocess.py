@@ -1,8 +1,23 @@
+import gzip
+import io
+import os
+import sys
+import threading
 from unittest.mock import patch
 
 import pytest
-from umierrorcorrect.models.models import FastpConfig
-from umierrorcorrect.preprocess import run_fastp
+from umierrorcorrect.core.read_fastq_records import read_fastq_chunks, read_fastq_chunks_interleaved
+from umierrorcorrect.models.models import FastpConfig, PreprocessConfig
+from umierrorcorrect.preprocess import (
+    _split_threads,
+    open_cutadapt_stream,
+    preprocess_pe,
+    preprocess_se,
+    run_fastp,
+)
+
+READ1 = "@r1 1:N:0:1\nAACCGGTTACGT\n+\nABCDEFGHIJKL\n@r2 1:N:0:1\nTTGGCCAAGGTT\n+\nLKJIHGFEDCBA\n"
+READ2 = "@r1 2:N:0:1\nGGGGCCCCAAAA\n+\nABCDEFGHIJKL\n@r2 2:N:0:1\nCCCCAAAATTTT\n+\nLKJIHGFEDCBA\n"
 
 
 @pytest.fixture
@@ -98,3 +113,165 @@ def test_run_fastp_single(mock_is_tool, mock_subprocess, tmp_path):
     args = mock_subprocess.call_args[0][0]
     assert "--in2" not in args
     assert "--out1" in args
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 40, 4096])
+def test_read_fastq_chunks(chunk_size):
+    """Chunks hold complete records whatever the chunk size."""
+    chunks = list(read_fastq_chunks(io.BytesIO(READ1.encode()), chunk_size))
+
+    assert all(chunk.count(b"\n") % 4 == 0 and chunk.endswith(b"\n") for chunk in chunks)
+    assert b"".join(chunks) == READ1.encode()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 40, 4096])
+def test_read_fastq_chunks_file(tmp_path, chunk_size):
+    """Records are not split in memory-mapped files, also when qualities start with '@'."""
+    data = READ1 + "@r3 1:N:0:1\nACGT\n+\n@@+@\n@r4 1:N:0:1\nTTTT\n+\n@ABC\n"
+    fastq = tmp_path / "R1.fastq"
+    fastq.write_text(data)
+
+    with fastq.open("rb") as f:
+        chunks = list(read_fastq_chunks(f, chunk_size))
+
+    assert all(chunk.count(b"\n") % 4 == 0 and chunk.endswith(b"\n") for chunk in chunks)
+    assert b"".join(chunks) == data.encode()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 4096])
+@pytest.mark.parametrize(
+    ("data", "expected"),
+    [
+        (b"@r1\nACGT\n+\nIIII\n@r2\n\n+\n\n", b"@r1\nACGT\n+\nIIII\n@r2\n\n+\n\n"),
+        (b"@r1\nACGT\n+\nIIII\n@r2\n\n+\n", b"@r1\nACGT\n+\nIIII\n@r2\n\n+\n\n"),
+        (b"@r1\nACGT\n+\nIIII", b"@r1\nACGT\n+\nIIII\n"),
+        (b"@r1\nACGT\n+\nIIII\n\n", b"@r1\nACGT\n+\nIIII\n"),
+    ],
+)
+def test_read_fastq_chunks_last_record(chunk_size, data, expected):
+    """An empty last read is kept, and a missing final newline is added."""
+    assert b"".join(read_fastq_chunks(io.BytesIO(data), chunk_size)) == expected
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 4096])
+def test_read_fastq_chunks_file_empty_last_read(tmp_path, chunk_size):
+    """An empty last read in a memory-mapped file is kept."""
+    data = b"@r1\nACGT\n+\nIIII\n@r2\n\n+\n\n"
+    fastq = tmp_path / "R1.fastq"
+    fastq.write_bytes(data)
+
+    with fastq.open("rb") as f:
+        assert b"".join(read_fastq_chunks(f, chunk_size)) == data
+
+
+def test_read_fastq_chunks_incomplete_record():
+    """A file ending inside a record is an error."""
+    with pytest.raises(ValueError):
+        list(read_fastq_chunks(io.BytesIO(b"@r1\nACGT\n+\n")))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 40, 1 << 20])
+def test_read_fastq_chunks_interleaved(chunk_size):
+    """Interleaved records are split into whole R1 and R2 chunks."""
+    lines1, lines2 = READ1.splitlines(keepends=True), READ2.splitlines(keepends=True)
+    interleaved = "".join(lines1[0:4] + lines2[0:4] + lines1[4:8] + lines2[4:8]).encode()
+
+    chunks = list(read_fastq_chunks_interleaved(io.BytesIO(interleaved), chunk_size))
+
+    assert b"".join(c[0] for c in chunks).decode() == READ1
+    assert b"".join(c[1] for c in chunks).decode() == READ2
+    with pytest.raises(ValueError):
+        list(read_fastq_chunks_interleaved(io.BytesIO("".join(lines1[0:4]).encode()), chunk_size))
+
+
+def test_preprocess_se(tmp_path):
+    """The barcode is moved to the read name and the barcode and spacer are trimmed."""
+    infile = tmp_path / "R1.fastq"
+    outfile = tmp_path / "out.fastq"
+    infile.write_text(READ1)
+
+    assert preprocess_se(str(infile), str(outfile), 4, 2) == 2
+    assert outfile.read_text() == "@r1:AACC 1:N:0:1\nTTACGT\n+\nGHIJKL\n@r2:TTGG 1:N:0:1\nAAGGTT\n+\nFEDCBA\n"
+
+
+def test_preprocess_se_gzipped(tmp_path):
+    """Gzipped input and output are streamed through gzip."""
+    infile = tmp_path / "R1.fastq.gz"
+    outfile = tmp_path / "out.fastq.gz"
+    infile.write_bytes(gzip.compress(READ1.encode()))
+
+    assert preprocess_se(str(infile), str(outfile), 4, 2, gziptool="gzip") == 2
+    assert gzip.decompress(outfile.read_bytes()).decode() == (
+        "@r1:AACC 1:N:0:1\nTTACGT\n+\nGHIJKL\n@r2:TTGG 1:N:0:1\nAAGGTT\n+\nFEDCBA\n"
+    )
+
+
+@pytest.mark.parametrize(
+    "dual_index, expected_r2",
+    [
+        (False, "@r1:AACC 2:N:0:1\nGGGGCCCCAAAA\n+\nABCDEFGHIJKL\n@r2:TTGG 2:N:0:1\nCCCCAAAATTTT\n+\nLKJIHGFEDCBA\n"),
+        (True, "@r1:AACCGGGG 2:N:0:1\nCCAAAA\n+\nGHIJKL\n@r2:TTGGCCCC 2:N:0:1\nAATTTT\n+\nFEDCBA\n"),
+    ],
+)
+@pytest.mark.parametrize("num_threads", [1, 8])
+def test_preprocess_pe(tmp_path, dual_index, expected_r2, num_threads):
+    """Both reads get the barcode, read 2 is only trimmed with dual indices."""
+    r1file, r2file = tmp_path / "R1.fastq", tmp_path / "R2.fastq"
+    out1, out2 = tmp_path / "out_R1.fastq", tmp_path / "out_R2.fastq"
+    r1file.write_text(READ1)
+    r2file.write_text(READ2)
+
+    assert preprocess_pe(str(r1file), str(r2file), str(out1), str(out2), 4, 2, dual_index, num_threads) == 4
+    barcodes = ("AACCGGGG", "TTGGCCCC") if dual_index else ("AACC", "TTGG")
+    assert out1.read_text() == (
+        f"@r1:{barcodes[0]} 1:N:0:1\nTTACGT\n+\nGHIJKL\n@r2:{barcodes[1]} 1:N:0:1\nAAGGTT\n+\nFEDCBA\n"
+    )
+    assert out2.read_text() == expected_r2
+
+
+@pytest.mark.parametrize(
+    ("num_threads", "num_handles", "expected"),
+    [(1, 2, (1, 0)), (2, 2, (1, 0)), (8, 2, (1, 6)), (8, 1, (2, 6))],
+)
+def test_split_threads(num_threads, num_handles, expected):
+    """At most two threads go to (de)compression, the rest to worker processes."""
+    assert _split_threads(num_threads, num_handles) == expected
+
+
+def test_preprocess_config_tmpdir_deprecated(tmp_path):
+    """Passing tmpdir warns, since preprocessing no longer writes temporary files."""
+    read1 = tmp_path / "R1.fastq"
+    read1.write_text(READ1)
+    with (
+        patch("umierrorcorrect.models.models.is_tool", return_value=True),
+        pytest.warns(DeprecationWarning, match="tmpdir"),
+    ):
+        PreprocessConfig(read1=read1, output_path=tmp_path / "out", umi_length=4, tmpdir=tmp_path)
+
+
+@pytest.mark.parametrize(("num_threads", "expected"), [(1, (1, 0)), (4, (1, 0)), (6, (1, 2)), (8, (1, 4))])
+def test_split_threads_paired_end(num_threads, expected):
+    """With four files, each handle gets one thread and the workers get what is left."""
+    assert _split_threads(num_threads, 4) == expected
+
+
+@pytest.mark.filterwarnings("error::pytest.PytestUnhandledThreadExceptionWarning")
+def test_open_cutadapt_stream_consumer_error(tmp_path, monkeypatch):
+    """An error while reading the trimmed reads stops cutadapt and its stderr logging thread."""
+    cutadapt = tmp_path / "cutadapt"
+    cutadapt.write_text(
+        f"#!{sys.executable}\n"
+        "import sys\n"
+        "print('trimming', file=sys.stderr, flush=True)\n"
+        "while True:\n"
+        "    sys.stdout.write('@r1\\nACGT\\n+\\nIIII\\n')\n"
+    )
+    cutadapt.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    threads = threading.active_count()
+
+    with pytest.raises(RuntimeError, match="consumer failed"), open_cutadapt_stream("R1.fastq", None, "illumina") as f:
+        f.read(16)
+        raise RuntimeError("consumer failed")
+
+    assert threading.active_count() == threads
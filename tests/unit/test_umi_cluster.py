@@ -1,12 +1,17 @@
 """Unit tests for umierrorcorrect.core.umi_cluster module."""
 
+import numpy as np
 import pytest
 from umierrorcorrect.core.umi_cluster import (
     _HAS_NUMBA,
+    _encode,
+    _encode_barcodes,
     _hamming_native,
+    _hamming_packed,
     cluster_barcodes,
     create_substring_matrix,
     get_adj_matrix_from_substring,
+    get_clusters,
     get_connected_components,
     hamming_distance,
     merge_clusters,
@@ -15,7 +20,7 @@ from umierrorcorrect.core.umi_cluster import (
 
 # Import numba-specific functions if available
 if _HAS_NUMBA:
-    from umierrorcorrect.core.umi_cluster import _hamming_numba
+    from umierrorcorrect.core.umi_cluster import _hamming_numba, _pairwise_edges_numba
 
 
 class TestHammingDistance:
@@ -96,6 +101,56 @@ class TestHammingNumba:
         for a, b in test_pairs:
             assert _hamming_numba(a, b) == _hamming_native(a, b)
 
+    def test_numba_pairwise_edges(self):
+        """Numba edge search returns all index pairs within the threshold."""
+        barcodes = ["AAAAAAAA", "AAAAAAAC", "AAAAAACC", "TTTTTTTT"]
+        codes = np.array([_encode(b) for b in barcodes], dtype=np.uint64)
+
+        assert _pairwise_edges_numba(codes, 1).tolist() == [[0, 1], [1, 2]]
+        assert _pairwise_edges_numba(codes, 2).tolist() == [[0, 1], [0, 2], [1, 2]]
+        assert _pairwise_edges_numba(codes[:1], 1).shape == (0, 2)
+
+
+class TestHammingPacked:
+    """Tests for the 2-bit packed barcode encoding and hamming distance."""
+
+    def test_encode(self):
+        """Bases are packed as A=00, C=01, G=10, T=11."""
+        assert _encode("A") == 0
+        assert _encode("ACGT") == 0b00011011
+        assert _encode("TTTT") == 0b11111111
+
+    def test_packed_matches_native(self):
+        """Packed distance should match the string implementation."""
+        test_pairs = [
+            ("ACGT", "ACGT"),
+            ("ACGT", "ACGA"),
+            ("ACGT", "TGCA"),
+            ("AAAAAAAAAAAA", "CCCCCCCCCCCC"),
+            ("ACGTACGTACGT", "ACGTACGTACGA"),
+            ("A" * 32, "T" * 32),
+        ]
+        for a, b in test_pairs:
+            assert _hamming_packed(_encode(a), _encode(b)) == _hamming_native(a, b)
+
+    def test_encode_barcodes(self):
+        """All barcodes are packed when they are valid."""
+        encoded = _encode_barcodes(["ACGT", "TGCA"])
+        assert encoded == {"ACGT": _encode("ACGT"), "TGCA": _encode("TGCA")}
+
+    def test_encode_barcodes_rejects_unpackable(self):
+        """Barcodes that cannot be packed into 64 bits fall back to None."""
+        assert _encode_barcodes(["ACGN", "ACGT"]) is None
+        assert _encode_barcodes(["ACGT", "ACG"]) is None
+        assert _encode_barcodes(["A" * 33]) is None
+        assert _encode_barcodes([""]) is None
+
+    def test_cluster_barcodes_with_n(self):
+        """Barcodes containing N are still clustered via the string distance."""
+        barcodes = {"AAAAAAAAAAAA": 10, "AAAAAAAAAAAN": 2}
+        adj_matrix = cluster_barcodes(barcodes, edit_distance_threshold=1)
+        assert adj_matrix == {"AAAAAAAAAAAA": ["AAAAAAAAAAAN"]}
+
 
 class TestUmiClusterClass:
     """Tests for umi_cluster class."""
@@ -160,6 +215,14 @@ class TestCreateSubstringMatrix:
         # Third substring of ACGTACGTACGA is ACGA
         assert "ACGA" in substr_dict3
 
+    def test_edit_distance_3(self):
+        """Edit distance threshold 3 splits barcodes into 4 substrings, the last taking the remainder."""
+        barcodes = {"ACGTACGTACGTAC": 10}
+        result = create_substring_matrix(barcodes, 3)
+
+        assert len(result) == 4
+        assert [list(d) for d in result] == [["ACG"], ["TAC"], ["GTA"], ["CGTAC"]]
+
 
 class TestGetAdjMatrixFromSubstring:
     """Tests for get_adj_matrix_from_substring function."""
@@ -212,6 +275,12 @@ class TestGetAdjMatrixFromSubstring:
         for a, b in pairs:
             assert a != b, "Self-pair found"
 
+    def test_singleton_buckets_yield_no_pairs(self):
+        """Barcodes that share no substring are never paired."""
+        barcodes = {"AAAACCCC": 10, "GGGGTTTT": 5}
+        substring_matrix = create_substring_matrix(barcodes, 1)
+        assert list(get_adj_matrix_from_substring(barcodes, substring_matrix)) == []
+
 
 class TestClusterBarcodes:
     """Tests for cluster_barcodes function."""
@@ -317,6 +386,28 @@ class TestClusterBarcodes:
         neighbors = adj_matrix["AAAAAAAAAAAA"]
         assert "AAAAAAAAAAAC" in neighbors or "AAAAAAAAAAAG" in neighbors
 
+    @pytest.mark.parametrize("edit_distance_threshold", [1, 2])
+    def test_small_barcode_set_matches_pairwise_comparison(self, edit_distance_threshold):
+        """Edges of the small barcode path should match a brute-force pairwise comparison."""
+        barcodes = {
+            "AACCGGTT": 9,
+            "AACCGGTA": 8,
+            "AACCGGAA": 7,
+            "TACCGGTT": 6,
+            "GGGGCCCC": 5,
+            "GGGGCCCA": 4,
+            "TTTTTTTT": 3,
+        }
+        expected = set()
+        for a in barcodes:
+            for b in barcodes:
+                if barcodes[a] > barcodes[b] and _hamming_native(a, b) <= edit_distance_threshold:
+                    expected.add((a, b))
+
+        adj_matrix = cluster_barcodes(barcodes, edit_distance_threshold)
+        edges = {(a, b) for a, neighbors in adj_matrix.items() for b in neighbors}
+        assert edges == expected
+
 
 class TestGetConnectedComponents:
     """Tests for get_connected_components function."""
@@ -368,6 +459,46 @@ class TestGetConnectedComponents:
         # First element should be the highest count barcode
         assert clusters[0][0] == "AAAAAAAAAAAA"
 
+    def test_neighbors_of_absorbed_barcodes_are_not_merged(self):
+        """Only direct neighbors of a centroid join its cluster (no transitive merging)."""
+        barcodes = {
+            "AAAAAAAAAAAA": 10,
+            "AAAAAAAAAAAC": 5,  # neighbor of AAAAAAAAAAAA
+            "AAAAAAAAAACC": 2,  # neighbor of AAAAAAAAAAAC only
+        }
+        adj_matrix = {"AAAAAAAAAAAA": ["AAAAAAAAAAAC"], "AAAAAAAAAAAC": ["AAAAAAAAAACC"]}
+        clusters = get_connected_components(barcodes, adj_matrix)
+
+        assert clusters == [["AAAAAAAAAAAA", "AAAAAAAAAAAC"], ["AAAAAAAAAACC"]]
+
+
+class TestGetClusters:
+    """Tests for get_clusters function."""
+
+    @pytest.mark.parametrize("edit_distance_threshold", [1, 2, 3])
+    def test_matches_adjacency_matrix_pipeline(self, sample_barcode_counts_large, edit_distance_threshold):
+        """Fused clustering should match cluster_barcodes followed by get_connected_components."""
+        adj_matrix = cluster_barcodes(sample_barcode_counts_large, edit_distance_threshold)
+        expected = get_connected_components(sample_barcode_counts_large, adj_matrix)
+
+        assert get_clusters(sample_barcode_counts_large, edit_distance_threshold) == expected
+
+    def test_small_barcode_set(self, sample_barcode_counts):
+        """Clusters are ordered by centroid count with the centroid first."""
+        clusters = get_clusters(sample_barcode_counts, 1)
+
+        assert clusters == [["ACGTACGTACGT", "ACGTACGTACGG", "ACGTACGTACGA"], ["GGGGGGGGGGGG", "GGGGGGGGGGGA"]]
+
+    def test_empty_barcode_dict(self):
+        """Empty barcode dictionary should return no clusters."""
+        assert get_clusters({}, 1) == []
+
+    def test_barcodes_with_n(self):
+        """Barcodes that cannot be packed are compared as strings."""
+        barcodes = {"ACGTNACGTA": 10, "ACGTNACGTC": 3, "TTTTNTTTTT": 2}
+
+        assert get_clusters(barcodes, 1) == [["ACGTNACGTA", "ACGTNACGTC"], ["TTTTNTTTTT"]]
+
 
 class TestMergeClusters:
     """Tests for merge_clusters function."""
@@ -5,7 +5,7 @@ from pathlib import Path
 
 import pysam
 
-from umierrorcorrect.core.logging_config import get_logger, log_subprocess_stderr
+from umierrorcorrect.core.logging_config import get_logger, log_subprocess_stderr, run_logged_subprocess
 
 logger = get_logger(__name__)
 
@@ -78,10 +78,9 @@ def align_bwa(
 
     try:
         with sam_file.open("w") as g:
-            result = subprocess.run(bwacommand, stdout=g, stderr=subprocess.PIPE, check=True)
-            log_subprocess_stderr(result.stderr, "bwa-mem")
+            run_logged_subprocess(bwacommand, "bwa-mem", stdout=g)
     except subprocess.CalledProcessError as e:
-        logger.error(f"bwa mem failed: {e.stderr.decode() if e.stderr else 'Unknown error'}")
+        logger.error(f"bwa mem failed: {e.stderr or 'Unknown error'}")
         _cleanup_files(sam_file)
         return None
 
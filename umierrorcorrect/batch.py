@@ -244,7 +244,6 @@ def process_sample(
         vc_method="count",
         params_file=None,
         output_json=False,
-        tmpdir=None,
         fastp_config=fastp_config,
     )
 
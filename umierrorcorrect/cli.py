@@ -8,7 +8,7 @@ import typer
 from rich.console import Console
 from rich.text import Text
 
-from umierrorcorrect.core.constants import ASCII_ART, DEFAULT_FAMILY_SIZES_STR
+from umierrorcorrect.core.constants import ASCII_ART, DEFAULT_FAMILY_SIZES_STR, DEFAULT_GZIP_LEVEL
 from umierrorcorrect.core.logging_config import add_file_handler, get_log_path, get_logger, setup_logging
 from umierrorcorrect.version import __version__
 
@@ -64,6 +64,10 @@ def preprocess(
         typer.Option("-a", "--adapter", help="Adapter sequence to trim (used by cutadapt; fastp uses auto-detection)."),
     ] = "illumina",
     force: Annotated[bool, typer.Option("-f", "--force", help="Overwrite existing files.")] = False,
+    gzip_level: Annotated[
+        int,
+        typer.Option("--gzip-level", min=1, max=9, help="Compression level (1-9) of the output FASTQ files."),
+    ] = DEFAULT_GZIP_LEVEL,
     fastp: Annotated[
         bool, typer.Option("--fastp/--no-fastp", help="Enable fastp quality filtering and UMI extraction.")
     ] = True,
@@ -122,7 +126,7 @@ def preprocess(
         adapter_trimming=adapter_trimming,
         adapter_sequence=adapter_sequence,
         force=force,
-        tmpdir=None,
+        gzip_level=gzip_level,
         fastp_config=fastp_config,
     )
 
@@ -284,12 +288,13 @@ def filter_bam(
     infile: Annotated[Path, typer.Option("-i", "--infile", help="Path to input BAM file.")],
     outfile: Annotated[Path, typer.Option("-o", "--outfile", help="Path to output BAM file.")],
     cutoff: Annotated[int, typer.Option("-c", "--cutoff", help="Consensus depth cutoff.")] = 3,
+    threads: Annotated[int, typer.Option("-t", "--threads", help="Number of BAM compression threads.")] = 4,
 ) -> None:
     """Filter BAM file by removing reads below consensus depth threshold."""
     from umierrorcorrect.core.filter import filter_bam as run_filter_bam
 
     logger.info("Filtering BAM file")
-    run_filter_bam(str(infile), str(outfile), cutoff)
+    run_filter_bam(str(infile), str(outfile), cutoff, threads)
     logger.info("BAM filtering complete!")
 
 
@@ -153,6 +153,7 @@ class ConsensusRead:
     def _write_split_read_to_bam(self, f: pysam.AlignmentFile) -> None:
         """Helper to write split reads."""
         j = 0
+        name_prefix, _, count = self.name.rpartition("_Count=")
         for i, s in enumerate(self.splits):
             a = pysam.AlignedSegment()
             if isinstance(s, tuple):
@@ -166,8 +167,7 @@ class ConsensusRead:
 
             a.query_sequence = self.seq[start:end]
             if a.query_sequence:
-                parts = self.name.split("_Count=")
-                a.query_name = f"{parts[0]}_{chr(j + 97)}_Count={parts[1]}"
+                a.query_name = f"{name_prefix}_{chr(j + 97)}_Count={count}"
                 j += 1
                 a.flag = 0
                 a.reference_id = f.references.index(self.contig)
@@ -84,6 +84,15 @@ DEFAULT_FAMILY_SIZES = (0, 1, 2, 3, 4, 5, 7, 10, 20, 30)
 SINGLETON_FAMILY_SIZES = (0, 1)
 """Family sizes used for singleton reads."""
 
+# =============================================================================
+# FASTQ Processing Constants
+# =============================================================================
+FASTQ_CHUNK_SIZE = 4 * 1024 * 1024
+"""Number of bytes read at a time when rewriting FASTQ files."""
+
+DEFAULT_GZIP_LEVEL = 1
+"""Compression level of the FASTQ files with UMIs in the read names, which are only an intermediate."""
+
 # =============================================================================
 # File Suffixes
 # =============================================================================
@@ -15,7 +15,7 @@ def filter_cons(filename, raw_depth_cutoff=150, fsizes=DEFAULT_FAMILY_SIZES_STR,
         passdepth = False
         for line in f:
             parts = line.split("\t")
-            if parts[3] not in "":
+            if parts[3]:  # on-target positions have a region name
                 fsize = parts[13]
                 if fsize == "0":
                     depth = int(parts[12])
@@ -29,11 +29,16 @@ def filter_cons(filename, raw_depth_cutoff=150, fsizes=DEFAULT_FAMILY_SIZES_STR,
                     g.write(line)
 
 
-def filter_bam(infilename, outfilename, consensus_cutoff):
+def filter_bam(infilename, outfilename, consensus_cutoff, threads=4):
     consensus_cutoff = int(consensus_cutoff)
-    with pysam.AlignmentFile(infilename, "rb") as f, pysam.AlignmentFile(outfilename, "wb", template=f) as g:
-        reads = f.fetch()
-        for read in reads:
-            size = int(read.qname.rsplit("=", 1)[-1])
+    # threads enables multi-threaded BGZF decompression/compression in htslib
+    with (
+        pysam.AlignmentFile(infilename, "rb", threads=threads) as f,
+        pysam.AlignmentFile(outfilename, "wb", template=f, threads=threads) as g,
+    ):
+        # until_eof reads the file sequentially without the index
+        for read in f.fetch(until_eof=True):
+            name = read.query_name
+            size = int(name[name.rindex("=") + 1 :])
             if size >= consensus_cutoff:
                 g.write(read)
@@ -2,9 +2,12 @@
 """Logging configuration using loguru for umierrorcorrect."""
 
 import contextlib
+import subprocess
+from collections import deque
+from collections.abc import Iterable
 from datetime import datetime
 from pathlib import Path
-from typing import Literal
+from typing import IO, Literal
 
 from loguru import logger
 from rich.logging import RichHandler
@@ -20,6 +23,9 @@ LOG_FORMAT = (
     "<level>{message}</level>"
 )
 
+# Maximum number of captured stderr lines logged for an external tool
+MAX_STDERR_LOG_LINES = 200
+
 
 def setup_logging(
     level: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"] = "INFO",
@@ -128,23 +134,72 @@ def add_file_handler(
     return _file_handler_id
 
 
+def _format_stderr_lines(stderr: str | bytes) -> str:
+    """Join the non-empty lines of captured stderr, limited to MAX_STDERR_LOG_LINES lines."""
+    # Convert bytes to string if needed
+    if isinstance(stderr, bytes):
+        stderr = stderr.decode("utf-8", errors="replace")
+
+    lines = [line for line in stderr.splitlines() if line.strip()]
+    if len(lines) > MAX_STDERR_LOG_LINES:
+        rest = len(lines) - MAX_STDERR_LOG_LINES
+        lines = lines[:MAX_STDERR_LOG_LINES]
+        lines.append(f"... ({rest} more lines)")
+    return "\n".join(lines)
+
+
 def log_subprocess_stderr(stderr: str | bytes | None, tool_name: str) -> None:
     """Log captured stderr from an external tool.
 
+    The lines are logged as one multiline debug record, limited to the first
+    MAX_STDERR_LOG_LINES lines. The stderr is only decoded if a sink accepts
+    debug messages.
+
     Args:
         stderr: Stderr output from subprocess (string or bytes).
         tool_name: Name of the external tool for log context.
     """
-    if stderr is None:
+    if stderr is None or not stderr.strip():
         return
 
-    # Convert bytes to string if needed
-    if isinstance(stderr, bytes):
-        stderr = stderr.decode("utf-8", errors="replace")
+    logger.opt(lazy=True).debug(f"[{tool_name}] stderr:\n{{}}", lambda: _format_stderr_lines(stderr))
+
+
+def log_subprocess_stream(stream: Iterable[str], tool_name: str, tail: deque[str]) -> None:
+    """Log the lines of an external tool's stderr stream as they are written.
 
-    stderr = stderr.strip()
-    if stderr:
-        # Log each line separately for readability
-        for line in stderr.splitlines():
-            if line.strip():
-                logger.debug(f"[{tool_name}] {line}")
+    Args:
+        stream: Text stream, e.g. the stderr of a subprocess opened with text=True.
+        tool_name: Name of the external tool for log context.
+        tail: Deque with a maxlen that keeps the last lines, e.g. for error messages.
+    """
+    for line in stream:
+        line = line.rstrip()
+        if line.strip():
+            logger.debug(f"[{tool_name}] {line}")
+            tail.append(line)
+
+
+def run_logged_subprocess(
+    command: list[str], tool_name: str, stdout: int | IO | None = subprocess.DEVNULL, tail_lines: int = 50
+) -> None:
+    """Run an external tool and log its stderr line by line while it runs.
+
+    Unlike capturing stderr with subprocess.run, memory use does not grow with the
+    amount of output, and progress messages are logged as they are written.
+
+    Args:
+        command: Command and arguments to run.
+        tool_name: Name of the external tool for log context.
+        stdout: Where to send stdout, a file object or a subprocess constant. Discarded by default.
+        tail_lines: Number of final stderr lines kept for the error if the tool fails.
+
+    Raises:
+        subprocess.CalledProcessError: If the tool exits with a non-zero status. The stderr
+            attribute holds the last tail_lines lines of stderr.
+    """
+    tail: deque[str] = deque(maxlen=tail_lines)
+    with subprocess.Popen(command, stdout=stdout, stderr=subprocess.PIPE, text=True, errors="replace") as proc:
+        log_subprocess_stream(proc.stderr, tool_name, tail)
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, command, stderr="\n".join(tail))
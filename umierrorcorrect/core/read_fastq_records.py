@@ -1,43 +1,195 @@
 #!/usr/bin/env python3
 
+import io
+import mmap
 from collections.abc import Generator
-from typing import TextIO
+from typing import BinaryIO
 
+import numpy as np
 
-def read_fastq(infile: TextIO) -> Generator[tuple[str, str, str], None, None]:
-    """Read one fastq record at a time using a generator.
+from umierrorcorrect.core.constants import FASTQ_CHUNK_SIZE
+
+
+def read_fastq_chunks(infile: BinaryIO, chunk_size: int = FASTQ_CHUNK_SIZE) -> Generator[bytes, None, None]:
+    """Read FASTQ data in chunks of complete records.
+
+    The file is read chunk_size bytes at a time and each chunk is cut after its last
+    complete record, so that the records of a chunk can be processed on their own,
+    e.g. by splitting all lines at once with bytes.splitlines. Regular files are
+    memory-mapped, so that each chunk is copied only once; pipes are read as a stream.
 
     Args:
-        infile: Open file handle for reading FASTQ records.
+        infile: FASTQ file opened in binary mode, positioned at the start.
+        chunk_size: Number of bytes to read at a time.
 
     Yields:
-        Tuple of (name, sequence, quality) for each record.
+        Chunk of complete records, four lines each, ending with a newline.
+
+    Raises:
+        ValueError: If the file ends with an incomplete record.
+    """
+    # decompressing readers such as gzip.GzipFile return the fileno of the compressed file
+    if not isinstance(infile, (io.BufferedReader, io.FileIO)):
+        yield from _read_stream_chunks(infile, chunk_size)
+        return
+    try:
+        mm = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):  # pipes and empty files
+        yield from _read_stream_chunks(infile, chunk_size)
+        return
+    with mm:
+        if hasattr(mmap, "MADV_SEQUENTIAL"):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        yield from _read_mmap_chunks(mm, chunk_size)
+
+
+def _complete_last_record(data: bytes) -> bytes:
+    """Check the records at the end of the data and add the final newline if it is missing.
+
+    Trailing blank lines are ignored. A last record with an empty sequence may also end
+    with its '+' line, i.e. without the newline of its empty quality line.
+
+    Raises:
+        ValueError: If the data ends with an incomplete record.
+    """
+    if not data.strip():
+        return b""
+    if not data.endswith(b"\n"):
+        data += b"\n"
+    num_lines = data.count(b"\n")
+    if num_lines % 4 == 3:
+        seq, plus = data[:-1].rsplit(b"\n", 2)[-2:]
+        if not seq and plus.startswith(b"+"):
+            data += b"\n"
+            num_lines += 1
+    if num_lines % 4 != 0:
+        raise ValueError("FASTQ file ends with an incomplete record")
+    return data
+
+
+def _read_stream_chunks(infile: BinaryIO, chunk_size: int) -> Generator[bytes, None, None]:
+    """Read chunks of complete records from a stream, see read_fastq_chunks."""
+    tail = b""
+    while buf := infile.read(chunk_size):
+        data = tail + buf
+        # the end of the last complete record is the newline before the lines of an incomplete one
+        end = len(data)
+        for _ in range(data.count(b"\n") % 4 + 1):
+            end = data.rfind(b"\n", 0, end)
+        end += 1
+        if end:
+            yield data[:end]
+        tail = data[end:]
+    if tail := _complete_last_record(tail):
+        yield tail
+
+
+def _last_record_start(mm: mmap.mmap, start: int, end: int) -> int:
+    """Position of the last record starting in mm[start + 1 : end], or -1 if there is none.
+
+    A line starting with '@' is a read name if the line after the next starts with '+'.
+    A quality line starting with '@' is followed by a read name and a sequence instead.
     """
-    for line in infile:
-        name = line.rstrip()
-        seq = infile.readline().rstrip()
-        infile.readline()  # skip + line
-        qual = infile.readline().rstrip()
-        yield (name, seq, qual)
+    pos = end
+    while (pos := mm.rfind(b"\n@", start, pos)) >= 0:
+        name_end = mm.find(b"\n", pos + 1)
+        seq_end = mm.find(b"\n", name_end + 1) if name_end >= 0 else -1
+        if seq_end >= 0 and mm[seq_end + 1 : seq_end + 2] == b"+":
+            return pos + 1
+    return -1
 
 
-def read_fastq_paired_end(r1file: TextIO, r2file: TextIO) -> Generator[tuple[str, str, str, str, str, str], None, None]:
-    """Read paired-end FASTQ records from two files.
+def _read_mmap_chunks(mm: mmap.mmap, chunk_size: int) -> Generator[bytes, None, None]:
+    """Read chunks of complete records from a memory-mapped file, see read_fastq_chunks.
+
+    Chunks are cut at record starts found near the end of each chunk, so that the
+    records do not have to be counted and each chunk is sliced from the map once.
+    """
+    start = 0
+    size = chunk_size
+    while len(mm) - start > size:
+        end = _last_record_start(mm, start, start + size)
+        if end < 0:
+            # a record longer than the chunk size
+            size *= 2
+            continue
+        yield mm[start:end]
+        start = end
+        size = chunk_size
+    if tail := _complete_last_record(mm[start:]):
+        yield tail
+
+
+def _split_records(data: bytes, n: int) -> tuple[bytes, bytes]:
+    """Split FASTQ data after its first n records."""
+    # find the newlines with one vectorized scan instead of splitting the data into lines
+    newlines = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == ord("\n"))
+    end = int(newlines[4 * n - 1]) + 1
+    return data[:end], data[end:]
+
+
+def read_fastq_chunks_paired_end(
+    r1file: BinaryIO, r2file: BinaryIO, chunk_size: int = FASTQ_CHUNK_SIZE
+) -> Generator[tuple[bytes, bytes], None, None]:
+    """Read paired-end FASTQ data in chunks with the same number of records.
+
+    Args:
+        r1file: R1 FASTQ file opened in binary mode.
+        r2file: R2 FASTQ file opened in binary mode.
+        chunk_size: Number of bytes to read at a time from each file.
+
+    Yields:
+        Tuple of (chunk1, chunk2) with the records of the same read pairs, as in
+        read_fastq_chunks. Reading stops at the end of the shorter file.
+    """
+    chunks2 = read_fastq_chunks(r2file, chunk_size)
+    data1 = data2 = b""
+    for chunk1 in read_fastq_chunks(r1file, chunk_size):
+        data1 += chunk1
+        n1 = data1.count(b"\n") // 4
+        n2 = data2.count(b"\n") // 4
+        while n2 < n1:
+            chunk2 = next(chunks2, None)
+            if chunk2 is None:
+                break
+            data2 += chunk2
+            n2 = data2.count(b"\n") // 4
+        if n2 == 0:
+            return
+        # keep the records without a mate in this chunk for the next one
+        out1, data1 = _split_records(data1, n2) if n2 < n1 else (data1, b"")
+        out2, data2 = _split_records(data2, n1) if n1 < n2 else (data2, b"")
+        yield out1, out2
+
+
+def read_fastq_chunks_interleaved(
+    infile: BinaryIO, chunk_size: int = FASTQ_CHUNK_SIZE
+) -> Generator[tuple[bytes, bytes], None, None]:
+    """Read interleaved paired-end FASTQ data in chunks, split into R1 and R2 records.
 
     Args:
-        r1file: Open file handle for R1 FASTQ file.
-        r2file: Open file handle for R2 FASTQ file.
+        infile: Interleaved FASTQ file or stream (R1, R2, R1, ...) opened in binary mode.
+        chunk_size: Number of bytes to read at a time.
 
     Yields:
-        Tuple of (name1, seq1, qual1, name2, seq2, qual2) for each read pair.
+        Tuple of (chunk1, chunk2) with the records of the same read pairs, as in
+        read_fastq_chunks_paired_end.
+
+    Raises:
+        ValueError: If the data ends with a read without its mate.
     """
-    for line1, line2 in zip(r1file, r2file):
-        name1 = line1.rstrip()
-        name2 = line2.rstrip()
-        seq1 = r1file.readline().rstrip()
-        seq2 = r2file.readline().rstrip()
-        r1file.readline()
-        r2file.readline()
-        qual1 = r1file.readline().rstrip()
-        qual2 = r2file.readline().rstrip()
-        yield (name1, seq1, qual1, name2, seq2, qual2)
+    carry = b""
+    for chunk in read_fastq_chunks(infile, chunk_size):
+        lines = (carry + chunk).splitlines(keepends=True)
+        n = len(lines) - len(lines) % 8
+        # a chunk can end between the two reads of a pair
+        carry = b"".join(lines[n:])
+        lines1: list[bytes] = [b""] * (n // 2)
+        lines2: list[bytes] = [b""] * (n // 2)
+        for i in range(4):
+            lines1[i::4] = lines[i:n:8]
+            lines2[i::4] = lines[4 + i : n : 8]
+        if lines1:
+            yield b"".join(lines1), b"".join(lines2)
+    if carry:
+        raise ValueError("Interleaved FASTQ data ends with a read without its mate")
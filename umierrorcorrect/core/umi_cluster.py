@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 import itertools
-from collections.abc import Generator
+from collections import defaultdict
+from collections.abc import Collection, Generator, Iterable
 from dataclasses import dataclass
 from operator import ne
 
+import numpy as np
+
 from umierrorcorrect.core.constants import SUBSTRING_OPTIMIZATION_THRESHOLD
 
 # Try to import numba for JIT-compiled hamming distance
@@ -14,6 +17,9 @@ try:
 except Exception:  # Catch ImportError and other initialization errors (e.g. from llvmlite)
     _HAS_NUMBA = False
 
+# np.bitwise_count (vectorized popcount) is only available in numpy >= 2.0
+_HAS_BITWISE_COUNT = hasattr(np, "bitwise_count")
+
 
 @dataclass
 class umi_cluster:
@@ -40,12 +46,10 @@ def _hamming_original(a, b):
 
     Original implementation from umierrorcorrect, now deprecated.
     """
-    try:
-        assert len(a) == len(b)
-        return sum(i != j for i, j in zip(a, b))
-    except AssertionError as error:
+    if len(a) != len(b):
         print(f"Barcode lengths are not equal for {a}. {b}")
-        raise (error)
+        raise AssertionError(f"Barcode lengths are not equal for {a}. {b}")
+    return sum(map(ne, a, b))
 
 
 def _hamming_native(a: str, b: str) -> int:
@@ -72,6 +76,78 @@ if _HAS_NUMBA:
 else:
     hamming_distance = _hamming_native
 
+
+# ----------------------------------------------
+# 2-bit packed barcodes
+# ----------------------------------------------
+
+_BASE4_TABLE = str.maketrans("ACGT", "0123")
+_EVEN_BITS_MASK = 0x5555555555555555
+_MAX_PACKED_LENGTH = 32  # 2 bits per base in a 64-bit word
+
+
+def _encode(seq: str) -> int:
+    """Pack a DNA sequence into an int using 2 bits per base (A=00, C=01, G=10, T=11)."""
+    return int(seq.translate(_BASE4_TABLE), 4)
+
+
+def _encode_barcodes(barcodes: Iterable[str]) -> dict[str, int] | None:
+    """Pack all barcodes with `_encode`.
+
+    Returns None if the barcodes differ in length, are longer than 32 bases or
+    contain anything other than A, C, G and T, in which case the string-based
+    hamming distance has to be used instead.
+    """
+    encoded: dict[str, int] = {}
+    umi_length = -1
+    for barcode in barcodes:
+        if umi_length < 0:
+            umi_length = len(barcode)
+            if not 0 < umi_length <= _MAX_PACKED_LENGTH:
+                return None
+        if len(barcode) != umi_length or barcode.strip("ACGT"):
+            return None
+        encoded[barcode] = _encode(barcode)
+    return encoded
+
+
+def _hamming_packed(a: int, b: int) -> int:
+    """Hamming distance between two barcodes packed with `_encode`.
+
+    A base differs if either bit of its 2-bit code differs, so both bits are
+    folded onto the lower one before counting.
+    """
+    x = a ^ b
+    return ((x | (x >> 1)) & _EVEN_BITS_MASK).bit_count()
+
+
+if _HAS_NUMBA:
+    _EVEN_BITS_MASK_U64 = np.uint64(_EVEN_BITS_MASK)
+
+    @njit(cache=True)
+    def _pairwise_edges_numba(codes: np.ndarray, edit_distance_threshold: int) -> np.ndarray:
+        """Numba JIT-compiled search for all pairs of packed barcodes within the threshold.
+
+        Returns an (n_edges, 2) array of index pairs (i, j) with i < j.
+        """
+        n = codes.shape[0]
+        edges = np.empty((n * (n - 1) // 2, 2), dtype=np.int32)
+        num_edges = 0
+        for i in range(n):
+            for j in range(i + 1, n):
+                x = codes[i] ^ codes[j]
+                x = (x | (x >> np.uint64(1))) & _EVEN_BITS_MASK_U64
+                distance = 0
+                while x:
+                    x &= x - np.uint64(1)
+                    distance += 1
+                if distance <= edit_distance_threshold:
+                    edges[num_edges, 0] = i
+                    edges[num_edges, 1] = j
+                    num_edges += 1
+        return edges[:num_edges]
+
+
 # ----------------------------------------------
 # UMI clustering functions
 # ----------------------------------------------
@@ -79,145 +155,218 @@ else:
 
 # TODO: Do these implementations match [UMI-tools](https://github.com/CGATOxford/UMI-tools/tree/77e186c6b51917136fe5b4faf3f01ead7eb75aff)?
 # TODO: Can this be improved? Or better to call UMI-tools directly?
-def create_substring_matrix(barcodedict: dict[str, int], edit_distance_threshold: int) -> list[dict[str, list[str]]]:
-    """Divide each barcode in two or three substrings of (approximately) equal length."""
-    edit_distance_threshold = int(edit_distance_threshold)
-    umi_length = len(list(barcodedict.keys())[0])
-    if edit_distance_threshold <= 1:
-        s = round(umi_length // 2)
-        substr_dict1: dict[str, list[str]] = {}
-        substr_dict2: dict[str, list[str]] = {}
-        for barcode in barcodedict:
-            sub1 = barcode[:s]
-            sub2 = barcode[s:]
-            if sub1 not in substr_dict1:
-                substr_dict1[sub1] = []
-            if sub2 not in substr_dict2:
-                substr_dict2[sub2] = []
-            substr_dict1[sub1].append(barcode)
-            substr_dict2[sub2].append(barcode)
-        return [substr_dict1, substr_dict2]
-    if edit_distance_threshold == 2:
-        s = round(umi_length // 3)
-        substr_dict1: dict[str, list[str]] = {}
-        substr_dict2: dict[str, list[str]] = {}
-        substr_dict3: dict[str, list[str]] = {}
-        for barcode in barcodedict:
-            sub1 = barcode[:s]
-            sub2 = barcode[s : 2 * s]
-            sub3 = barcode[2 * s :]
-            if sub1 not in substr_dict1:
-                substr_dict1[sub1] = []
-            if sub2 not in substr_dict2:
-                substr_dict2[sub2] = []
-            if sub3 not in substr_dict3:
-                substr_dict3[sub3] = []
-            substr_dict1[sub1].append(barcode)
-            substr_dict2[sub2].append(barcode)
-            substr_dict3[sub3].append(barcode)
-        return [substr_dict1, substr_dict2, substr_dict3]
-    return []  # Default case if threshold > 2 or invalid
+def _substring_bounds(umi_length: int, edit_distance_threshold: int) -> list[tuple[int, int]]:
+    """Start and end of each of the edit_distance_threshold + 1 substrings of a barcode."""
+    num_parts = max(int(edit_distance_threshold), 0) + 1
+    s = umi_length // num_parts
+    # the last substring takes the remainder of the barcode
+    return [(i * s, (i + 1) * s) for i in range(num_parts - 1)] + [((num_parts - 1) * s, umi_length)]
+
+
+def create_substring_matrix(barcodedict: Collection[str], edit_distance_threshold: int) -> list[dict[str, list[str]]]:
+    """Divide each barcode in edit_distance_threshold + 1 substrings of (approximately) equal length.
+
+    Two barcodes within the edit distance threshold share at least one of these
+    substrings, so only barcodes in the same substring bucket need to be compared.
+    """
+    if not barcodedict:
+        return []
+    bounds = _substring_bounds(len(next(iter(barcodedict))), edit_distance_threshold)
+    substr_dicts: list[defaultdict[str, list[str]]] = [defaultdict(list) for _ in bounds]
+    for barcode in barcodedict:
+        for substr_dict, (start, end) in zip(substr_dicts, bounds):
+            substr_dict[barcode[start:end]].append(barcode)
+    return [dict(substr_dict) for substr_dict in substr_dicts]
 
 
 def get_adj_matrix_from_substring(
-    barcodedict: dict[str, int], substrdictlist: list[dict[str, list[str]]]
+    barcodedict: Collection[str],  # noqa: ARG001
+    substrdictlist: list[dict[str, list[str]]],
 ) -> Generator[tuple[str, str], None, None]:
-    """A generator that generates combinations to test for edit distance."""
-    umi_length = len(list(barcodedict.keys())[0])
-    if len(substrdictlist) == 2:
-        substr_dict1, substr_dict2 = substrdictlist
-        s = round(umi_length // 2)
-        for barcode in barcodedict:
-            neighbors: set[str] = set()
-            sub1 = barcode[:s]
-            neighbors = neighbors.union(substr_dict1[sub1])
-            sub2 = barcode[s:]
-            neighbors = neighbors.union(substr_dict2[sub2])
-            neighbors.remove(barcode)
-            for neighbor in neighbors:
-                yield barcode, neighbor
-    if len(substrdictlist) == 3:
-        substr_dict1, substr_dict2, substr_dict3 = substrdictlist
-        s = round(umi_length // 3)
-        for barcode in barcodedict:
-            neighbors: set[str] = set()
-            sub1 = barcode[:s]
-            neighbors = neighbors.union(substr_dict1[sub1])
-            sub2 = barcode[s : 2 * s]
-            neighbors = neighbors.union(substr_dict2[sub2])
-            sub3 = barcode[2 * s :]
-            neighbors = neighbors.union(substr_dict3[sub3])
-            neighbors.remove(barcode)
-            for neighbor in neighbors:
-                # comb.append( (barcode, neighbor))
-                yield barcode, neighbor
-    # return(comb)
+    """A generator that generates combinations to test for edit distance.
 
+    Pairs are only drawn from substring buckets with at least two barcodes. A pair
+    sharing more than one substring is generated once per shared substring.
+    """
+    for substr_dict in substrdictlist:
+        for bucket in substr_dict.values():
+            if len(bucket) > 1:
+                yield from itertools.combinations(bucket, 2)
 
-def cluster_barcodes(barcodedict: dict[str, int], edit_distance_threshold: int) -> dict[str, list[str]]:
-    """Cluster barcodes by edit distance."""
-    edit_distance_threshold = int(edit_distance_threshold)
-    adj_matrix: dict[str, list[str]] = {}
-    if len(barcodedict) > SUBSTRING_OPTIMIZATION_THRESHOLD:
+
+def _pairwise_edges_vectorized(encoded: list[int], edit_distance_threshold: int) -> np.ndarray:
+    """Find all pairs of packed barcodes within the threshold as an (E, 2) array.
+
+    Uses the numba kernel if numba is installed, otherwise computes all pairwise
+    distances at once with numpy.
+    """
+    codes = np.fromiter(encoded, dtype=np.uint64, count=len(encoded))
+    if _HAS_NUMBA:
+        edges = _pairwise_edges_numba(codes, edit_distance_threshold)
+    else:
+        x = codes[:, None] ^ codes[None, :]
+        distances = np.bitwise_count((x | (x >> 1)) & np.uint64(_EVEN_BITS_MASK))
+        edges = np.argwhere(np.triu(distances <= edit_distance_threshold, 1))
+    return edges
+
+
+def _find_edges(umi_sorted: list[str], edit_distance_threshold: int) -> np.ndarray:
+    """Find all pairs of barcodes within the edit distance threshold.
+
+    Barcodes are identified by their index in umi_sorted, which is sorted by
+    decreasing count. Returns an (E, 2) array of pairs (i, j) sorted by i, then j.
+    Every pair has i < j, so the first barcode of a pair is the one with the higher
+    count (or the one seen first if counts are equal).
+    """
+    encoded = _encode_barcodes(umi_sorted)
+    codes = list(encoded.values()) if encoded is not None else None
+    if len(umi_sorted) > SUBSTRING_OPTIMIZATION_THRESHOLD:
         # compare substrings for speedup
-        substring_matrix = create_substring_matrix(barcodedict, edit_distance_threshold)
-        comb = get_adj_matrix_from_substring(barcodedict, substring_matrix)
+        rank = {umi: i for i, umi in enumerate(umi_sorted)}
+        substring_matrix = create_substring_matrix(umi_sorted, edit_distance_threshold)
+        # pairs sharing several substrings are generated more than once
+        comb = sorted({(rank[a], rank[b]) for a, b in get_adj_matrix_from_substring(umi_sorted, substring_matrix)})
+    elif codes is not None and (_HAS_NUMBA or _HAS_BITWISE_COUNT):
+        return _pairwise_edges_vectorized(codes, edit_distance_threshold)
     else:
-        comb = itertools.combinations(barcodedict.keys(), 2)
-    # print(comb)
-    # comb=itertools.combinations(barcodedict.keys(),2)
-    for a, b in comb:
-        if hamming_distance(a, b) <= edit_distance_threshold:
-            if barcodedict[a] >= barcodedict[b]:
-                if a not in adj_matrix:
-                    adj_matrix[a] = []
-                if b not in adj_matrix[a]:
-                    adj_matrix[a].append(b)
-            else:
-                if b not in adj_matrix:
-                    adj_matrix[b] = []
-                if a not in adj_matrix[b]:
-                    adj_matrix[b].append(a)
+        comb = itertools.combinations(range(len(umi_sorted)), 2)
+    if codes is not None:
+        edges = [(i, j) for i, j in comb if _hamming_packed(codes[i], codes[j]) <= edit_distance_threshold]
+    elif _HAS_NUMBA and len(set(map(len, umi_sorted))) == 1:
+        # encode once instead of on every call to the numba wrapper
+        raw = [umi.encode() for umi in umi_sorted]
+        edges = [(i, j) for i, j in comb if _hamming_numba_core(raw[i], raw[j]) <= edit_distance_threshold]
+    else:
+        edges = [(i, j) for i, j in comb if hamming_distance(umi_sorted[i], umi_sorted[j]) <= edit_distance_threshold]
+    return np.array(edges, dtype=np.int64).reshape(-1, 2)
+
+
+def _neighbors_csr(edges: np.ndarray, num_barcodes: int) -> tuple[list[int], list[int]]:
+    """Convert edges sorted by their first barcode to compressed sparse rows.
+
+    The neighbors of barcode i are indices[indptr[i] : indptr[i + 1]].
+    """
+    indptr = np.zeros(num_barcodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(edges[:, 0], minlength=num_barcodes), out=indptr[1:])
+    return indptr.tolist(), edges[:, 1].tolist()
+
+
+def _assign_clusters(umi_sorted: list[str], indptr: list[int], indices: list[int]) -> list[list[str]]:
+    """Assign barcodes to clusters, visiting them in order of decreasing count.
+
+    Each barcode that is not yet part of a cluster becomes a centroid and absorbs
+    its direct neighbors that are not yet part of a cluster. Neighbors are given as
+    compressed sparse rows (see `_neighbors_csr`) and membership is tracked in a
+    bytearray, both indexed by the barcode's rank in umi_sorted.
+    """
+    added = bytearray(len(umi_sorted))
+    clusters: list[list[str]] = []
+    for i, umi in enumerate(umi_sorted):
+        if added[i]:
+            continue
+        added[i] = 1
+        cluster = [umi]
+        for j in indices[indptr[i] : indptr[i + 1]]:
+            if not added[j]:
+                added[j] = 1
+                cluster.append(umi_sorted[j])
+        clusters.append(cluster)
+    return clusters
+
+
+def _cluster_by_substring(umi_sorted: list[str], edit_distance_threshold: int) -> list[list[str]]:
+    """Assign barcodes to clusters, comparing each barcode only to earlier centroids.
+
+    Gives the same clusters as `_assign_clusters`: visiting barcodes in order of
+    decreasing count, a barcode joins the first centroid within the threshold or
+    becomes a centroid itself. Only centroids are added to the substring buckets, so
+    pairs of barcodes that were both absorbed into clusters are never compared.
+    """
+    encoded = _encode_barcodes(umi_sorted)
+    codes = list(encoded.values()) if encoded is not None else None
+    bounds = _substring_bounds(len(umi_sorted[0]), edit_distance_threshold)
+    buckets: list[dict[str, list[int]]] = [{} for _ in bounds]
+    clusters: list[list[str]] = []
+    cluster_index: dict[int, int] = {}  # rank of centroid -> index in clusters
+    for j, umi in enumerate(umi_sorted):
+        substrings = [umi[start:end] for start, end in bounds]
+        centroid = -1
+        for bucket, substring in zip(buckets, substrings):
+            # buckets are in rank order, so the first hit is the best in this bucket
+            for i in bucket.get(substring, ()):
+                if centroid >= 0 and i >= centroid:
+                    break
+                if codes is not None:
+                    distance = _hamming_packed(codes[i], codes[j])
+                else:
+                    distance = hamming_distance(umi_sorted[i], umi)
+                if distance <= edit_distance_threshold:
+                    centroid = i
+                    break
+        if centroid >= 0:
+            clusters[cluster_index[centroid]].append(umi)
+        else:
+            cluster_index[j] = len(clusters)
+            clusters.append([umi])
+            for bucket, substring in zip(buckets, substrings):
+                bucket.setdefault(substring, []).append(j)
+    return clusters
+
+
+def cluster_barcodes(barcodedict: dict[str, int], edit_distance_threshold: int) -> dict[str, list[str]]:
+    """Cluster barcodes by edit distance.
+
+    Returns an adjacency matrix mapping each barcode to the barcodes with a lower
+    count within the edit distance threshold.
+    """
+    umi_sorted = sorted(barcodedict, key=barcodedict.__getitem__, reverse=True)  # sort umis by counts, reversed
+    adj_matrix: dict[str, list[str]] = {}
+    for i, j in _find_edges(umi_sorted, int(edit_distance_threshold)).tolist():
+        centroid = umi_sorted[i]
+        if centroid not in adj_matrix:
+            adj_matrix[centroid] = []
+        adj_matrix[centroid].append(umi_sorted[j])
     return adj_matrix
 
 
 def get_connected_components(barcodedict: dict[str, int], adj_matrix: dict[str, list[str]]) -> list[list[str]]:
-    """Get connected components from the adjacency matrix."""
-    clusters: list[list[str]] = []
-    added: set[str] = set()
-    umi_sorted = sorted(barcodedict, key=lambda x: barcodedict[x], reverse=True)  # sort umis by counts, reversed
+    """Get connected components from the adjacency matrix (see `_assign_clusters`)."""
+    umi_sorted = sorted(barcodedict, key=barcodedict.__getitem__, reverse=True)  # sort umis by counts, reversed
+    rank = {umi: i for i, umi in enumerate(umi_sorted)}
+    indptr = [0]
+    indices: list[int] = []
     for umi in umi_sorted:
-        if umi not in added:
-            if umi in adj_matrix:
-                cluster = [umi]
-                added.add(umi)
-                for neighbor in adj_matrix[umi]:
-                    if neighbor not in added:
-                        cluster.append(neighbor)
-                        added.add(neighbor)
-                clusters.append(cluster)
-            else:
-                cluster = [umi]
-                clusters.append(cluster)
-                added.add(umi)
-    return clusters
+        indices.extend(rank[neighbor] for neighbor in adj_matrix.get(umi, ()))
+        indptr.append(len(indices))
+    return _assign_clusters(umi_sorted, indptr, indices)
+
+
+def get_clusters(barcodedict: dict[str, int], edit_distance_threshold: int) -> list[list[str]]:
+    """Cluster barcodes by edit distance and return the clusters, centroid first.
+
+    Same result as get_connected_components(barcodedict, cluster_barcodes(...)), but
+    edges are collected as arrays of count-rank indices without building the
+    adjacency matrix.
+    """
+    umi_sorted = sorted(barcodedict, key=barcodedict.__getitem__, reverse=True)  # sort umis by counts, reversed
+    if len(umi_sorted) > SUBSTRING_OPTIMIZATION_THRESHOLD:
+        return _cluster_by_substring(umi_sorted, int(edit_distance_threshold))
+    edges = _find_edges(umi_sorted, int(edit_distance_threshold))
+    return _assign_clusters(umi_sorted, *_neighbors_csr(edges, len(umi_sorted)))
 
 
 def merge_clusters(barcodedict: dict[str, int], clusters: list[list[str]]) -> dict[str, umi_cluster]:
     """Merge UMI clusters and return dictionary mapping barcodes to cluster info."""
-    umis: dict[str, umi_cluster] = {}
-    # add all umis separately
-    for name, count in barcodedict.items():
-        umis[name] = umi_cluster(name, count)
+    # preallocate every key in barcode order so the dict is never resized
+    umis: dict[str, umi_cluster] = dict.fromkeys(barcodedict)
+    umis_setitem = umis.__setitem__
     for cluster in clusters:
-        # merge umi counts for clusters larger than 1
-        if len(cluster) > 1:
-            # first item in the list is the centroid
-            centroid = cluster[0]
-            neighbors = cluster[1:]
-            for neighbor in neighbors:
-                umis[centroid].add_count(umis[neighbor].count)
-            for neighbor in neighbors:
-                umis[neighbor] = umis[centroid]
-    # print(umis)
+        # first item in the list is the centroid, all members share its cluster object
+        merged = umi_cluster(cluster[0], sum(barcodedict[barcode] for barcode in cluster))
+        for barcode in cluster:
+            umis_setitem(barcode, merged)
+    # barcodes that are not part of any cluster are kept separately
+    for name, merged in umis.items():
+        if merged is None:
+            umis_setitem(name, umi_cluster(name, barcodedict[name]))
     return umis
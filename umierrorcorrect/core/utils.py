@@ -136,7 +136,7 @@ def parse_cons_file(filename: str, fsize: int = 3, include_position: bool = Fals
             parts = line.split("\t")
             name = parts[3]
 
-            if name not in "":
+            if name:
                 famsize = parts[-4]
                 if int(famsize) == fsize:
                     frac = float(parts[-2])
@@ -5,8 +5,6 @@ This module provides functions for generating downsampling analysis plots
 and statistics to assess sequencing depth and UMI family coverage.
 """
 
-import random
-from collections import Counter
 from pathlib import Path
 
 import matplotlib.pyplot as plt
@@ -17,6 +15,8 @@ from umierrorcorrect.core.logging_config import get_logger
 from umierrorcorrect.get_consensus_statistics import (
     RegionConsensusStats,
     get_stat,
+    resolve_consensus_bam,
+    sum_family_size_counts,
 )
 
 logger = get_logger(__name__)
@@ -72,73 +72,59 @@ def save_downsampled_table(all_results, tot_results, out_filename):
         tot_results: List of dictionaries with total downsampled statistics.
         out_filename: Path to save the output file.
     """
+    lines = []
+    for results in [tot_results[0], *all_results]:
+        for r, stat in results.items():
+            prefix = f"downsampled{r}\t"
+            lines.extend(prefix + line + "\n" for line in stat.write_stats_lines())
     with Path(out_filename).open("w") as g:
-        for r in tot_results[0]:
-            text = tot_results[0][r].write_stats()
-            lines = text.split("\n")
-            for line in lines:
-                g.write("downsampled" + str(r) + "\t" + line + "\n")
-        for region in all_results:
-            for r in region:
-                text = region[r].write_stats()
-                lines = text.split("\n")
-                for line in lines:
-                    g.write("downsampled" + str(r) + "\t" + line + "\n")
-
-
-def downsample_reads_per_region(hist, _fraction, fsizes, onlyNamed=True):
+        g.write("".join(lines))
+
+
+def downsample_reads_per_region(hist, _fraction, fsizes, onlyNamed=True, rng=None):
     """Downsample reads and calculate statistics at various rates.
 
+    Reads are drawn without replacement, so the number of reads each family keeps
+    follows a multivariate hypergeometric distribution over the family sizes.
+
     Args:
         hist: List of region_cons_stat objects with histogram data.
         _fraction: List of downsample rates.
         fsizes: List of family sizes to calculate statistics for.
         onlyNamed: If True, only process regions with names.
+        rng: Optional numpy random Generator, a new unseeded one is used if None.
 
     Returns:
         List of dictionaries mapping downsample rates to region_cons_stat objects.
     """
+    if rng is None:
+        rng = np.random.default_rng()
     all_results = []
     for h in hist:
-        run_analysis = True
         if onlyNamed and h.name == "":
-            run_analysis = False
-        if run_analysis:
-            # family_sizes: list of family sizes (e.g., [5, 3, 10, 2] means 4 families with 5, 3, 10, and 2 reads)
-            # singletons: number of singletons
-            num_families = len(h.family_sizes)
-            # tmpnames: list of family indices (e.g., [0, 1, 2, 3])
-            tmpnames = np.array(range(0, num_families))
-
-            # singnames: list of singleton indices (e.g., [3, 4])
-            singnames = list(range(num_families, num_families + h.singletons))
-
-            # Convert to np.array
-            times = np.array(h.family_sizes)
-
-            # Expand the temp names by the number of reads per family
-            # Result: [0,0,0,0,0, 1,1,1, 2,2,2,2,2,2,2,2,2,2]
-            # (5 reads from family 0, 3 from family 1, 10 from family 2)
-            reads = np.repeat(tmpnames, times, axis=0)  # expand to one entry per read
-            reads = list(reads) + singnames
-            results = {}
-            for r in _fraction:
-                # At 50% (r=0.5), we'd sample 10 random reads out of 20 total. Let's say we get:
-                # ds_reads = [0, 0, 0, 1, 2, 2, 2, 2, 2, 3]
-                ds_reads = random.sample(list(reads), round(r * len(reads)))  # noqa: S311 - downsample
-                new_hist = Counter(ds_reads).values()  # collapse to one entry per UMI family
-                # Counter: {0: 3, 1: 1, 2: 5, 3: 1}
-                # new_hist = [3, 1, 5, 1] (sorted descending: [5, 3, 1, 1])
-                new_hist = sorted(new_hist, reverse=True)  # sort
-                new_singletons = list(new_hist).count(1)  # count singletons in new
-                # Separate consensus families (≥2 reads) from singletons to avoid double-counting
-                # RegionConsensusStats expects singletons passed separately to constructor,
-                # and only consensus families passed to add_family_sizes()
-                consensus_hist = [x for x in new_hist if x > 1]
-                new_stat = RegionConsensusStats(h.regionid, h.pos, h.name, new_singletons, h.fsizes)
-                new_stat.add_family_sizes(consensus_hist, fsizes)
-                results[r] = new_stat
-            all_results.append(results)
+            continue
+        # One entry per family with its size, expanded from the family size histogram,
+        # followed by the singletons (e.g., [2, 3, 5, 10, 1, 1])
+        families = np.concatenate(
+            (
+                np.repeat(np.arange(len(h.family_size_counts)), h.family_size_counts),
+                np.ones(h.singletons, dtype=np.int64),
+            )
+        )
+        num_reads = int(families.sum())
+        results = {}
+        for r in _fraction:
+            # At 50% (r=0.5), we sample 10 of 20 reads, e.g. [5, 3, 0, 1, 0, 1] from the families above
+            new_hist = rng.multivariate_hypergeometric(families, round(r * num_reads))
+            new_singletons = int(np.count_nonzero(new_hist == 1))
+            # Separate consensus families (≥2 reads) from singletons to avoid double-counting
+            # RegionConsensusStats expects singletons passed separately to constructor,
+            # and only consensus families passed to add_family_sizes()
+            consensus_hist = new_hist[new_hist > 1]
+            new_stat = RegionConsensusStats(h.regionid, h.pos, h.name, new_singletons, h.fsizes)
+            new_stat.add_family_sizes(consensus_hist, fsizes)
+            results[r] = new_stat
+        all_results.append(results)
     return all_results
 
 
@@ -158,22 +144,14 @@ def run_downsampling(output_path, consensus_bam, bed_file=None, plot_fsizes=None
     logger.info("Running downsampling analysis")
     out_path = Path(output_path)
 
-    if not consensus_bam:
-        bam_files = list(out_path.glob("*_consensus_reads.bam"))
-        if not bam_files:
-            raise FileNotFoundError(f"No consensus BAM file found in {out_path}")
-        consensus_bam = str(bam_files[0])
-    if not samplename:
-        samplename = Path(consensus_bam).name.replace("_consensus_reads.bam", "")
+    consensus_bam, samplename = resolve_consensus_bam(out_path, consensus_bam, samplename)
 
     # Get stats directly from BAM (no stats file needed)
     region_stats_list = get_stat(consensus_bam, bed_file)
-    fsizes = list(DEFAULT_FAMILY_SIZES)[1:]  # Exclude 0, which is handled separately
+    fsizes = DEFAULT_FAMILY_SIZES[1:]  # Exclude 0, which is handled separately
     tot_results = RegionConsensusStats("All", "all_regions", "", 0, fsizes)
-
-    for h in region_stats_list:
-        tot_results.family_sizes = tot_results.family_sizes + h.family_sizes
-        tot_results.singletons += h.singletons
+    tot_results.family_size_counts = sum_family_size_counts(region_stats_list)
+    tot_results.singletons = sum(h.singletons for h in region_stats_list)
 
     downsample_rates = [x * 0.1 for x in range(1, 11)]  # 0.1 to 1.0
     tot = downsample_reads_per_region([tot_results], downsample_rates, fsizes, False)
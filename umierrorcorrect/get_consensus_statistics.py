@@ -6,10 +6,11 @@ from consensus BAM files. All statistics are derived directly from the BAM,
 eliminating the need for separate stats files.
 """
 
-from collections import Counter
 from dataclasses import dataclass, field
+from functools import cache
 from pathlib import Path
 
+import numpy as np
 import pysam
 
 from umierrorcorrect.core.constants import DEFAULT_FAMILY_SIZES, HISTOGRAM_SUFFIX
@@ -18,8 +19,11 @@ from umierrorcorrect.core.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Family size thresholds used by default; 0 (raw reads) is handled separately
+_FSIZES = DEFAULT_FAMILY_SIZES[1:]
 
-@dataclass
+
+@dataclass(slots=True)
 class RegionStats:
     """Statistics for a genomic region, derived from consensus BAM."""
 
@@ -67,13 +71,14 @@ def parse_consensus_read_name(qname: str) -> tuple[str, int]:
     Returns:
         (read_type, count) where read_type is 'Consensus' or 'Singleton'
     """
-    parts = qname.split("_")
-    read_type = parts[0]
-    count = int(qname.split("=")[-1])
+    read_type = qname.partition("_")[0]
+    count = int(qname[qname.rfind("=") + 1 :])
     return read_type, count
 
 
-def get_stats_from_bam(consensus_bam: str | Path, bed_file: str | Path | None = None) -> list[RegionStats]:
+def get_stats_from_bam(
+    consensus_bam: str | Path, bed_file: str | Path | None = None, threads: int = 4
+) -> list[RegionStats]:
     """Extract all statistics directly from consensus BAM.
 
     Groups reads by (chrom, start_position) to automatically merge
@@ -82,6 +87,7 @@ def get_stats_from_bam(consensus_bam: str | Path, bed_file: str | Path | None =
     Args:
         consensus_bam: Path to consensus BAM file.
         bed_file: Optional BED file for region name annotations.
+        threads: Number of BAM decompression threads.
 
     Returns:
         List of RegionStats objects, sorted by position.
@@ -91,37 +97,49 @@ def get_stats_from_bam(consensus_bam: str | Path, bed_file: str | Path | None =
     if bed_file:
         bed_regions = read_bed(str(bed_file))
 
-    # Key: (chrom, start_pos) -> RegionStats
-    regions: dict[tuple[str, int], RegionStats] = {}
-
-    with pysam.AlignmentFile(str(consensus_bam), "rb") as f:
-        for read in f.fetch():
-            if read.reference_name is None:
+    with pysam.AlignmentFile(str(consensus_bam), "rb", threads=threads) as f:
+        references = f.references
+        # One dict per reference id: start_pos -> RegionStats
+        regions_by_tid: list[dict[int, RegionStats]] = [{} for _ in references]
+        # Reads are sorted, so consecutive reads usually share a region; the
+        # region and its append method are only looked up when the start changes
+        current_tid = current_start = -1
+        region = None
+        add_count = None
+        for read in f.fetch(until_eof=True):  # sequential read, no index needed
+            tid = read.reference_id
+            if tid < 0:
                 continue
 
-            chrom = read.reference_name
             start = read.reference_start
             end = read.reference_end or start + 1
 
-            read_type, count = parse_consensus_read_name(read.query_name)
-
-            key = (chrom, start)
-            if key not in regions:
-                # Look up region name from BED if available
-                name = _get_bed_annotation(bed_regions, chrom, start, end)
-                regions[key] = RegionStats(chrom=chrom, start=start, end=end, name=name)
-
-            # Update end position to max seen
-            if end > regions[key].end:
-                regions[key].end = end
-
-            if read_type == "Consensus":
-                regions[key].consensus_counts.append(count)
+            if start != current_start or tid != current_tid:
+                current_tid = tid
+                current_start = start
+                regions = regions_by_tid[tid]
+                region = regions.get(start)
+                if region is None:
+                    # Look up region name from BED if available
+                    chrom = references[tid]
+                    name = _get_bed_annotation(bed_regions, chrom, start, end)
+                    region = regions[start] = RegionStats(chrom=chrom, start=start, end=end, name=name)
+                add_count = region.consensus_counts.append
+            if end > region.end:
+                # Update end position to max seen
+                region.end = end
+
+            # Same parsing as parse_consensus_read_name, inlined for the per-read loop;
+            # singletons always have Count=1, so their count is not parsed
+            qname = read.query_name
+            if qname.startswith("Consensus_"):
+                add_count(int(qname[qname.rfind("=") + 1 :]))
             else:  # Singleton
-                regions[key].singleton_count += 1
+                region.singleton_count += 1
 
     # Sort by chromosome and position
-    sorted_regions = sorted(regions.values(), key=lambda r: (r.chrom, r.start))
+    all_regions = (region for regions in regions_by_tid for region in regions.values())
+    sorted_regions = sorted(all_regions, key=lambda r: (r.chrom, r.start))
     return sorted_regions
 
 
@@ -135,24 +153,70 @@ def _get_bed_annotation(bed_regions: dict, chrom: str, start: int, end: int) ->
     return ""
 
 
+def _reverse_cumulative(counts: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Reverse cumulative sums of a family size histogram.
+
+    Returns the number of families and the number of reads in families with size
+    >= t at index t, followed by a trailing 0.
+    """
+    families = np.append(np.cumsum(counts[::-1])[::-1], 0)
+    reads = np.append(np.cumsum((counts * np.arange(len(counts)))[::-1])[::-1], 0)
+    return families, reads
+
+
+@cache
+def _threshold_index(fsizes: tuple[int, ...]) -> tuple[tuple[int, ...], dict[int, int]]:
+    """Thresholds (0 followed by fsizes, without duplicates) and the position of each.
+
+    Cached so that regions sharing the same family sizes share one index.
+    """
+    thresholds = tuple(dict.fromkeys((0, *fsizes)))
+    return thresholds, {fsize: i for i, fsize in enumerate(thresholds)}
+
+
 class RegionConsensusStats:
     """Statistics for a specific genomic region.
 
     This class provides backward compatibility with the output format
     while deriving all data from the consensus BAM.
 
+    Counts are stored as one array per statistic (read_counts, umi_counts),
+    aligned with thresholds, so that they can be summed across regions with numpy.
+
     Attributes:
         regionid (str): Identifier for the region.
         pos (str): Position information.
         name (str): Name of the region.
         singletons (int): Number of singleton reads.
-        family_sizes (list): List of family sizes.
+        family_sizes (list): List of family sizes, only filled if store_family_sizes is set.
+        family_size_counts (np.ndarray): Number of families of each size, indexed by size.
+        store_family_sizes (bool): Whether to keep the individual family sizes.
+        fsizes (list): Family size thresholds.
+        thresholds (tuple): Threshold 0 followed by the family size thresholds.
+        read_counts (np.ndarray): Total reads at each threshold in thresholds.
+        umi_counts (np.ndarray): UMI counts at each threshold in thresholds.
         total_reads (dict): Total reads at different family size thresholds.
         umis (dict): UMI counts at different family size thresholds.
-        fsizes (list): Family size thresholds.
     """
 
-    def __init__(self, regionid, pos, name, singletons, fsizes):
+    __slots__ = (
+        "regionid",
+        "pos",
+        "name",
+        "singletons",
+        "_buf",
+        "_len",
+        "family_size_counts",
+        "store_family_sizes",
+        "_reverse_cum",
+        "fsizes",
+        "thresholds",
+        "_index",
+        "read_counts",
+        "umi_counts",
+    )
+
+    def __init__(self, regionid, pos, name, singletons, fsizes, store_family_sizes=False):
         """Initialize RegionConsensusStats.
 
         Args:
@@ -161,22 +225,71 @@ class RegionConsensusStats:
             name (str): Region name.
             singletons (int): Count of singleton reads.
             fsizes (list): List of family size thresholds.
+            store_family_sizes (bool): Keep every family size in family_sizes, e.g. for
+                downsampling. Otherwise only the histogram is kept. Defaults to False.
         """
         self.regionid = regionid
         self.pos = pos
         self.name = name
         self.singletons = singletons
-        self.family_sizes = []
-        self.total_reads = {}
-        self.umis = {}
-        for fsize in fsizes:
-            self.total_reads[fsize] = 0
-            self.umis[fsize] = 0
-            self.total_reads[0] = self.singletons
-            self.umis[0] = self.singletons
-        self.total_reads[1] = self.singletons
-        self.umis[1] = self.singletons
+        # family sizes kept in a buffer that doubles in size when full
+        self._buf = np.empty(0, dtype=np.int32)
+        self._len = 0
+        self.family_size_counts = np.zeros(0, dtype=np.int64)
+        self.store_family_sizes = store_family_sizes
+        self._reverse_cum = None
         self.fsizes = fsizes
+        self.thresholds, self._index = _threshold_index(tuple(fsizes))
+        self.read_counts = np.zeros(len(self.thresholds), dtype=np.int64)
+        self.umi_counts = np.zeros(len(self.thresholds), dtype=np.int64)
+        # Singletons count towards the raw reads (threshold 0) and threshold 1
+        for fsize in (0, 1):
+            if fsize in self._index:
+                self.read_counts[self._index[fsize]] = singletons
+                self.umi_counts[self._index[fsize]] = singletons
+
+    def threshold_positions(self, fsizes) -> list[int]:
+        """Positions of the given family size thresholds in thresholds and the count arrays.
+
+        Args:
+            fsizes (list): Family size thresholds, each of them in thresholds.
+
+        Returns:
+            list[int]: Index into read_counts and umi_counts for each threshold.
+        """
+        return [self._index[fsize] for fsize in fsizes]
+
+    @property
+    def total_reads(self) -> dict[int, int]:
+        """Total reads at each threshold, keyed by family size threshold."""
+        return dict(zip(self.thresholds, self.read_counts.tolist()))
+
+    @property
+    def umis(self) -> dict[int, int]:
+        """UMI counts at each threshold, keyed by family size threshold."""
+        return dict(zip(self.thresholds, self.umi_counts.tolist()))
+
+    @property
+    def family_sizes(self) -> list[int]:
+        """Family sizes in the order they were added, if store_family_sizes is set."""
+        return self._buf[: self._len].tolist()
+
+    @property
+    def num_families(self) -> int:
+        """Number of families added with add_family_sizes."""
+        return int(self.family_size_counts.sum())
+
+    @property
+    def reverse_cum(self) -> tuple[np.ndarray, np.ndarray]:
+        """Number of families and of reads in families with size >= t, indexed by t.
+
+        Computed from family_size_counts (singletons excluded) and cached until
+        add_family_sizes is called again. Both arrays end with a 0 for thresholds
+        above the largest family size.
+        """
+        if self._reverse_cum is None:
+            self._reverse_cum = _reverse_cumulative(self.family_size_counts)
+        return self._reverse_cum
 
     @classmethod
     def from_region_stats(cls, region: RegionStats, fsizes: list[int]) -> "RegionConsensusStats":
@@ -208,31 +321,53 @@ class RegionConsensusStats:
             family_sizes (list): List of family sizes to add.
             fsizes (list): List of family size thresholds.
         """
+        sizes = np.asarray(family_sizes, dtype=np.int64)
+        counts = np.bincount(sizes)
+        families_ge, reads_ge = _reverse_cumulative(counts)
+
         # Threshold 0 represents raw read statistics (no UMI deduplication)
         # Total reads and UMIs are both equal to the sum of all reads in the families
-        self.total_reads[0] += sum(family_sizes)
-        self.umis[0] += sum(family_sizes)
+        self.read_counts[0] += reads_ge[0]
+        self.umi_counts[0] += reads_ge[0]
 
         # Thresholds >= 1 represent unique molecular statistics
-        for fsize in fsizes:
-            tmp = [x for x in family_sizes if x >= fsize]
-            self.total_reads[fsize] += sum(tmp)
-            self.umis[fsize] += len(tmp)
-        self.family_sizes.extend(family_sizes)
-
-    def write_stats(self):
-        """Format statistics for output.
+        # thresholds above the largest family size select the trailing zero
+        at = np.minimum(np.asarray(fsizes, dtype=np.int64), len(counts))
+        positions = self.threshold_positions(fsizes)
+        self.read_counts[positions] += reads_ge[at]
+        self.umi_counts[positions] += families_ge[at]
+
+        if len(counts) > len(self.family_size_counts):
+            counts[: len(self.family_size_counts)] += self.family_size_counts
+            self.family_size_counts = counts
+        else:
+            self.family_size_counts[: len(counts)] += counts
+        self._reverse_cum = None
+        if self.store_family_sizes:
+            end = self._len + len(sizes)
+            if end > len(self._buf):
+                buf = np.empty(max(end, 2 * len(self._buf), 64), dtype=np.int32)
+                buf[: self._len] = self._buf[: self._len]
+                self._buf = buf
+            self._buf[self._len : end] = sizes
+            self._len = end
+
+    def write_stats_lines(self):
+        """Format statistics for output, one line per family size threshold.
 
         Returns:
-            str: Tab-separated string of statistics for writing to file.
+            list[str]: Tab-separated lines without line endings.
         """
         lines = []
-        r0 = self.total_reads[0]
-        u0 = self.umis[0]
+        r0 = int(self.read_counts[0])
+        u0 = int(self.umi_counts[0])
         line = "\t".join([str(self.regionid), self.pos, self.name, "0", "1.0", str(r0), str(u0)])
         lines.append(line)
+        read_counts = self.read_counts.tolist()
+        umi_counts = self.umi_counts.tolist()
         for fsize in self.fsizes:
-            fraction = 0 if r0 == 0 else self.total_reads[fsize] / r0
+            i = self._index[fsize]
+            fraction = 0 if r0 == 0 else read_counts[i] / r0
             line = "\t".join(
                 [
                     str(self.regionid),
@@ -240,15 +375,25 @@ class RegionConsensusStats:
                     self.name,
                     str(fsize),
                     str(1.0 * fraction),
-                    str(self.total_reads[fsize]),
-                    str(self.umis[fsize]),
+                    str(read_counts[i]),
+                    str(umi_counts[i]),
                 ]
             )
             lines.append(line)
-        return "\n".join(lines)
+        return lines
+
+    def write_stats(self):
+        """Format statistics for output.
+
+        Returns:
+            str: Tab-separated string of statistics for writing to file.
+        """
+        return "\n".join(self.write_stats_lines())
 
 
-def get_stat(consensus_bam: Path | str, bed_file: Path | str | None = None) -> list[RegionConsensusStats]:
+def get_stat(
+    consensus_bam: Path | str, bed_file: Path | str | None = None, threads: int = 4
+) -> list[RegionConsensusStats]:
     """Get consensus statistics from BAM file.
 
     This is the main entry point, replacing the old version that needed stats file.
@@ -257,13 +402,13 @@ def get_stat(consensus_bam: Path | str, bed_file: Path | str | None = None) -> l
     Args:
         consensus_bam: Path to consensus BAM file.
         bed_file: Optional BED file for region name annotations.
+        threads: Number of BAM decompression threads.
 
     Returns:
         List of RegionConsensusStats objects.
     """
-    fsizes = list(DEFAULT_FAMILY_SIZES)[1:]  # Exclude 0, which is handled separately
-    regions = get_stats_from_bam(consensus_bam, bed_file)
-    return [RegionConsensusStats.from_region_stats(r, fsizes) for r in regions]
+    regions = get_stats_from_bam(consensus_bam, bed_file, threads)
+    return [RegionConsensusStats.from_region_stats(r, _FSIZES) for r in regions]
 
 
 def write_stats_file(stats: list[RegionConsensusStats], output_path: Path, sample_name: str) -> Path:
@@ -278,17 +423,47 @@ def write_stats_file(stats: list[RegionConsensusStats], output_path: Path, sampl
         Path to the written stats file.
     """
     stats_file = output_path / f"{sample_name}{HISTOGRAM_SUFFIX}"
+    # One line per region with consensus and singleton counts
+    lines = [
+        f"{stat.regionid}\t{stat.pos}\t{stat.name}\tconsensus_reads: {stat.num_families}\tsingletons: {stat.singletons}\n"
+        for stat in stats
+    ]
     with stats_file.open("w") as f:
-        for stat in stats:
-            # Write one line per region with consensus and singleton counts
-            f.write(
-                f"{stat.regionid}\t{stat.pos}\t{stat.name}\t"
-                f"consensus_reads: {len(stat.family_sizes)}\t"
-                f"singletons: {stat.singletons}\n"
-            )
+        f.write("".join(lines))
     return stats_file
 
 
+def sum_family_size_counts(stats):
+    """Sum the family size histograms of several regions.
+
+    Args:
+        stats (list): List of RegionConsensusStats objects.
+
+    Returns:
+        np.ndarray: Number of families of each size over all regions, indexed by size.
+    """
+    total = np.zeros(max((len(h.family_size_counts) for h in stats), default=0), dtype=np.int64)
+    for h in stats:
+        total[: len(h.family_size_counts)] += h.family_size_counts
+    return total
+
+
+def _count_matrix(stats, attrs, thresholds):
+    """Stack the count arrays named in attrs into an (attrs x regions x thresholds) array.
+
+    All count arrays are collected in a single pass over the regions. The columns are
+    looked up for each region, so that regions with different family sizes line up.
+    """
+    if not stats:
+        return np.zeros((len(attrs), 0, len(thresholds)), dtype=np.int64)
+    counts = np.empty((len(attrs), len(stats), len(thresholds)), dtype=np.int64)
+    for j, region in enumerate(stats):
+        columns = region.threshold_positions(thresholds)
+        for i, attr in enumerate(attrs):
+            counts[i, j] = getattr(region, attr)[columns]
+    return counts
+
+
 def calculate_target_coverage(stats, fsizes=None):
     """Calculate target coverage statistics for on-target and off-target reads.
 
@@ -301,34 +476,24 @@ def calculate_target_coverage(stats, fsizes=None):
             family_size, on_target, off_target, total, on_target_fraction, off_target_fraction
     """
     if fsizes is None:
-        fsizes = stats[0].fsizes if stats else list(DEFAULT_FAMILY_SIZES)[1:]
-
-    reads_all = {}
-    reads_target = {}
-    reads_offtarget = {}
-    fsizes_calc = fsizes.copy()
-    fsizes_calc.insert(0, 0)
-    for fsize in fsizes_calc:
-        reads_all[fsize] = 0
-        reads_target[fsize] = 0
-        reads_offtarget[fsize] = 0
-    for region in stats:
-        for fsize in fsizes_calc:
-            reads_all[fsize] += region.umis[fsize]
-            if region.name:
-                reads_target[fsize] += region.umis[fsize]
-            else:
-                reads_offtarget[fsize] += region.umis[fsize]
+        fsizes = stats[0].fsizes if stats else _FSIZES
+
+    fsizes_calc = [0, *fsizes]
+    (umi_counts,) = _count_matrix(stats, ("umi_counts",), fsizes_calc)
+    on_target = np.array([bool(region.name) for region in stats], dtype=np.int64)
+    reads_all = umi_counts.sum(axis=0)
+    reads_target = on_target @ umi_counts
+    reads_offtarget = reads_all - reads_target
     lines = []
-    for fsize in fsizes_calc:
-        if reads_all[fsize] > 0:
-            on_target_frac = reads_target[fsize] / reads_all[fsize]
-            off_target_frac = reads_offtarget[fsize] / reads_all[fsize]
-            lines.append(
-                f"{fsize}\t{reads_target[fsize]}\t{reads_offtarget[fsize]}\t{reads_all[fsize]}\t{on_target_frac}\t{off_target_frac}"
-            )
+    for fsize, target, offtarget, total in zip(
+        fsizes_calc, reads_target.tolist(), reads_offtarget.tolist(), reads_all.tolist()
+    ):
+        if total > 0:
+            on_target_frac = target / total
+            off_target_frac = offtarget / total
+            lines.append(f"{fsize}\t{target}\t{offtarget}\t{total}\t{on_target_frac}\t{off_target_frac}")
         else:
-            lines.append(f"{fsize}\t{reads_target[fsize]}\t{reads_offtarget[fsize]}\t{reads_all[fsize]}\t0\t0")
+            lines.append(f"{fsize}\t{target}\t{offtarget}\t{total}\t0\t0")
 
     return "\n".join(lines)
 
@@ -344,25 +509,46 @@ def get_overall_statistics(hist, fsizes=None):
         RegionConsensusStats: Aggregated statistics object.
     """
     if fsizes is None:
-        fsizes = hist[0].fsizes if hist else list(DEFAULT_FAMILY_SIZES)[1:]
+        fsizes = hist[0].fsizes if hist else _FSIZES
 
     histall = RegionConsensusStats("All", "all_regions", "", 0, fsizes)
-    fsizesnew = fsizes.copy()
-    histall.fsizes = fsizes
-    fsizesnew.insert(0, 0)
-    for fsize in fsizesnew:
-        histall.total_reads[fsize] = 0
-        histall.umis[fsize] = 0
-
-    for region in hist:
-        for fsize in fsizesnew:
-            histall.total_reads[fsize] += region.total_reads[fsize]
-            histall.umis[fsize] += region.umis[fsize]
+    histall.read_counts, histall.umi_counts = _count_matrix(
+        hist, ("read_counts", "umi_counts"), histall.thresholds
+    ).sum(axis=1)
     return histall
 
 
+def resolve_consensus_bam(out_path: Path, consensus_bam: str | None, samplename: str | None) -> tuple[str, str]:
+    """Find the consensus BAM and sample name when they are not given.
+
+    Args:
+        out_path: Output directory searched for a *_consensus_reads.bam file.
+        consensus_bam: Path to the consensus BAM file, or None to search out_path.
+        samplename: Sample name, or None to derive it from the BAM file name.
+
+    Returns:
+        Tuple of (consensus_bam, samplename).
+
+    Raises:
+        FileNotFoundError: If no consensus BAM is given or found in out_path.
+    """
+    if not consensus_bam:
+        bam_files = list(out_path.glob("*_consensus_reads.bam"))
+        if not bam_files:
+            raise FileNotFoundError(f"No consensus BAM file found in {out_path}")
+        consensus_bam = str(bam_files[0])
+    if not samplename:
+        samplename = Path(consensus_bam).name.replace("_consensus_reads.bam", "")
+    return consensus_bam, samplename
+
+
 def run_get_consensus_statistics(
-    output_path: str, consensus_filename: str | None, bed_file: str | None, output_raw: bool, samplename: str | None
+    output_path: str,
+    consensus_filename: str | None,
+    bed_file: str | None,
+    output_raw: bool,
+    samplename: str | None,
+    hist: list[RegionConsensusStats] | None = None,
 ):
     """Execute the consensus statistics calculation pipeline.
 
@@ -372,31 +558,28 @@ def run_get_consensus_statistics(
         bed_file: Optional path to BED file for region annotations.
         output_raw: Whether to output raw group counts.
         samplename: Name of the sample.
+        hist: Statistics already read from the consensus BAM with the same BED file,
+            e.g. by run_umi_errorcorrect. The BAM is scanned again if None.
     """
     logger.info("Getting consensus statistics")
     out_path = Path(output_path)
 
-    if not consensus_filename:
-        bam_files = list(out_path.glob("*_consensus_reads.bam"))
-        if not bam_files:
-            raise FileNotFoundError(f"No consensus BAM file found in {out_path}")
-        consensus_filename = str(bam_files[0])
-
-    if not samplename:
-        samplename = Path(consensus_filename).name.replace("_consensus_reads.bam", "")
+    consensus_filename, samplename = resolve_consensus_bam(out_path, consensus_filename, samplename)
 
     # Get stats directly from BAM
-    hist = get_stat(consensus_filename, bed_file)
-    fsizes = list(DEFAULT_FAMILY_SIZES)[1:]  # Exclude 0, which is handled separately
+    if hist is None:
+        hist = get_stat(consensus_filename, bed_file)
+    fsizes = _FSIZES
     histall = get_overall_statistics(hist, fsizes)
 
     # Write summary statistics
     outfilename = out_path / f"{samplename}_summary_statistics.txt"
     logger.info(f"Writing consensus statistics to {outfilename}")
+    lines = histall.write_stats_lines()
+    for stat in hist:
+        lines.extend(stat.write_stats_lines())
     with outfilename.open("w") as g:
-        g.write(histall.write_stats() + "\n")
-        for stat in hist:
-            g.write(stat.write_stats() + "\n")
+        g.write("\n".join(lines) + "\n")
 
     # Write target coverage (only meaningful with a BED file for region annotations)
     if bed_file:
@@ -406,15 +589,13 @@ def run_get_consensus_statistics(
 
     # Write raw group counts if requested
     if output_raw:
-        largehist = []
         outfilename = out_path / f"{samplename}_consensus_group_counts.txt"
-        for h in hist:
-            largehist = largehist + h.family_sizes
-            largehist = largehist + [1] * h.singletons
-        hist_counts = Counter(largehist)
+        hist_counts = sum_family_size_counts(hist)
+        hist_counts = np.pad(hist_counts, (0, max(2 - len(hist_counts), 0)))
+        hist_counts[1] += sum(h.singletons for h in hist)
+        sizes = np.flatnonzero(hist_counts)
         with outfilename.open("w") as g:
-            for size in sorted(hist_counts):
-                g.write(str(size) + "\t" + str(hist_counts[size]) + "\n")
+            g.writelines(f"{size}\t{count}\n" for size, count in zip(sizes.tolist(), hist_counts[sizes].tolist()))
 
     logger.info("Finished consensus statistics")
 
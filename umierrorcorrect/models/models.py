@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import csv
+import warnings
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
@@ -9,6 +10,7 @@ from typing import Literal
 from pydantic import BaseModel, ConfigDict, field_validator, model_validator
 
 from umierrorcorrect.core.check_args import is_tool
+from umierrorcorrect.core.constants import DEFAULT_GZIP_LEVEL
 from umierrorcorrect.core.utils import check_output_directory, get_sample_name
 
 
@@ -374,7 +376,8 @@ class PreprocessConfig(BaseModel):
     adapter_trimming: bool = False
     adapter_sequence: str = "illumina"
     force: bool = False
-    tmpdir: Path | None = None
+    tmpdir: Path | None = None  # Deprecated, the trimmed reads are no longer written to disk
+    gzip_level: int = DEFAULT_GZIP_LEVEL  # Compression level of the FASTQ files with UMIs in the read names
     fastp_config: FastpConfig | None = None  # Optional fastp configuration
 
     # Derived fields
@@ -383,6 +386,24 @@ class PreprocessConfig(BaseModel):
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
+    @field_validator("tmpdir")
+    @classmethod
+    def validate_tmpdir(cls, v: Path | None) -> Path | None:
+        if v is not None:
+            warnings.warn(
+                "tmpdir is deprecated and ignored, adapter trimming no longer writes temporary files.",
+                DeprecationWarning,
+                stacklevel=2,
+            )
+        return v
+
+    @field_validator("gzip_level")
+    @classmethod
+    def validate_gzip_level(cls, v: int) -> int:
+        if not 1 <= v <= 9:
+            raise ValueError(f"gzip level must be between 1 and 9, got {v}")
+        return v
+
     @model_validator(mode="after")
     def validate_and_configure(self) -> PreprocessConfig:
         # Check output directory
@@ -20,6 +20,7 @@ from pathlib import Path
 from umierrorcorrect.align import align_bwa, check_bwa_index
 from umierrorcorrect.call_variants import run_call_variants
 from umierrorcorrect.core.check_args import check_args_fastq
+from umierrorcorrect.core.constants import DEFAULT_GZIP_LEVEL
 from umierrorcorrect.core.logging_config import get_logger
 from umierrorcorrect.core.utils import get_sample_name
 from umierrorcorrect.get_consensus_statistics import run_get_consensus_statistics
@@ -87,7 +88,7 @@ def run_pipeline(args):
         adapter_trimming=args.adapter_trimming,
         adapter_sequence=getattr(args, "adapter_sequence", "illumina"),
         force=getattr(args, "force", False),
-        tmpdir=getattr(args, "tmpdir", None),
+        gzip_level=getattr(args, "gzip_level", DEFAULT_GZIP_LEVEL),
         fastp_config=fastp_config,
     )
     fastq_files, nseqs = run_preprocessing(preprocess_config)
@@ -125,14 +126,18 @@ def run_pipeline(args):
         output_json=getattr(args, "output_json", False),
         remove_large_files=getattr(args, "remove_large_files", False),
     )
-    run_umi_errorcorrect(umi_config)
+    stats = run_umi_errorcorrect(umi_config)
     output_path = Path(args.output_path)
     cons_bam = str(output_path / f"{args.sample_name}_consensus_reads.bam")
 
     # -----------------------------------------
     # Run consensus statistics
     # -----------------------------------------
-    run_get_consensus_statistics(args.output_path, cons_bam, None, False, args.sample_name)
+    # The error correction step has already read the consensus BAM; its statistics can be
+    # reused unless they were annotated with a BED file, which this step does not use.
+    run_get_consensus_statistics(
+        args.output_path, cons_bam, None, False, args.sample_name, hist=None if args.bed_file else stats
+    )
     args.cons_file = None
 
     # -----------------------------------------
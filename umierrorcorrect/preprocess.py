@@ -16,19 +16,44 @@ Preprocess FASTQ files for UMI error correction. This module handles:
 
 """
 
-import datetime
+import io
 import subprocess
-import tempfile
+import threading
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import ExitStack, contextmanager
+from functools import partial
+from itertools import islice
+from multiprocessing.pool import Pool
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Optional
 
 from umierrorcorrect.core.check_args import is_tool
-from umierrorcorrect.core.logging_config import get_logger, log_subprocess_stderr
-from umierrorcorrect.core.read_fastq_records import read_fastq, read_fastq_paired_end
+from umierrorcorrect.core.constants import DEFAULT_GZIP_LEVEL, FASTQ_CHUNK_SIZE
+from umierrorcorrect.core.logging_config import get_logger, log_subprocess_stderr, log_subprocess_stream
+from umierrorcorrect.core.read_fastq_records import (
+    read_fastq_chunks,
+    read_fastq_chunks_interleaved,
+    read_fastq_chunks_paired_end,
+)
 from umierrorcorrect.models.models import FastpConfig, FastpResult, PreprocessConfig
 
+try:
+    from xopen import xopen
+
+    _HAS_XOPEN = True
+except ImportError:
+    _HAS_XOPEN = False
+
 logger = get_logger(__name__)
 
+# Adapter sequences that can be given by name to cutadapt
+_ADAPTER_PRESETS = {
+    "illumina": "AGATCGGAAGAGC",
+    "nextera": "CTGTCTCTTATA",
+    "small-rna": "ATGGAATTCTCG",
+}
+
 
 def run_fastp(
     read1: Path,
@@ -164,224 +189,356 @@ def run_fastp(
         return None
 
 
-def generate_random_dir(tmpdir: str) -> str:
-    """Generate a directory for storing temporary files, using a timestamp."""
-    Path(tmpdir).mkdir(parents=True, exist_ok=True)
-    prefix = f"r{datetime.datetime.now().strftime('%y%m%d_%H%M%S')}_"
-    return tempfile.mkdtemp(prefix=prefix, dir=str(tmpdir))
+def _finish_gzip_process(proc: subprocess.Popen, command: list[str], program: str) -> None:
+    """Wait for a (un)pigz/gzip process and check that it succeeded."""
+    stderr = proc.stderr.read() if proc.stderr else None
+    returncode = proc.wait()
+    log_subprocess_stderr(stderr, program)
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, command, stderr=stderr)
+
 
+@contextmanager
+def open_fastq_stream(filename: str | Path, num_threads: int, program: str) -> Iterator[BinaryIO]:
+    """Open a FASTQ file for reading in binary mode.
 
-def run_unpigz(filename: str, tmpdir: str, num_threads: int, program: str) -> str:
-    """Unzip fastq.gz files using parallel gzip (pigz) or gunzip."""
-    input_path = Path(filename)
-    outfilename = Path(tmpdir) / input_path.name.removesuffix(".gz")
+    Gzipped files are decompressed with xopen if it is installed (multithreaded
+    in-process decompression with ISA-L), otherwise through a pipe from parallel gzip
+    (unpigz) or gunzip, so the uncompressed file is never written to disk.
+
+    Args:
+        filename: Path to the FASTQ file, gzipped if it ends with .gz.
+        num_threads: Number of decompression threads.
+        program: "pigz" or "gzip", used without xopen.
+
+    Yields:
+        Binary file handle with the uncompressed FASTQ data.
+    """
+    path = Path(filename)
+    if path.suffix != ".gz":
+        with path.open("rb") as f:
+            yield f
+        return
+
+    if _HAS_XOPEN:
+        with xopen(path, "rb", threads=num_threads) as f:
+            yield f
+        return
 
     if program == "pigz":
-        command = ["unpigz", "-p", str(num_threads), "-c", filename]
+        command = ["unpigz", "-p", str(num_threads), "-c", str(path)]
     else:
-        command = ["gunzip", "-c", filename]
+        command = ["gunzip", "-c", str(path)]
+
+    with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as proc:
+        yield proc.stdout
+        # read what was not consumed, so that the process is not killed by a broken pipe
+        while proc.stdout.read(FASTQ_CHUNK_SIZE):
+            pass
+        _finish_gzip_process(proc, command, program)
 
-    with outfilename.open("w") as g:
-        result = subprocess.run(command, stdout=g, stderr=subprocess.PIPE, check=True)
-        log_subprocess_stderr(result.stderr, program)
 
-    return str(outfilename)
+@contextmanager
+def open_fastq_output(
+    filename: str | Path, num_threads: int, program: str, compresslevel: int = DEFAULT_GZIP_LEVEL
+) -> Iterator[BinaryIO]:
+    """Open a FASTQ file for writing in binary mode.
 
+    Files ending with .gz are compressed while they are written, with xopen if it is
+    installed, otherwise through a pipe to parallel gzip (pigz) or gzip.
+
+    Args:
+        filename: Path to the output FASTQ file.
+        num_threads: Number of compression threads.
+        program: "pigz" or "gzip", used without xopen.
+        compresslevel: gzip compression level, 1 (fastest) to 9 (smallest).
+
+    Yields:
+        Binary file handle for the uncompressed FASTQ data.
+    """
+    path = Path(filename)
+    if path.suffix != ".gz":
+        with path.open("wb") as f:
+            yield f
+        return
+
+    if _HAS_XOPEN:
+        with xopen(path, "wb", threads=num_threads, compresslevel=compresslevel) as g:
+            yield g
+        return
 
-def run_pigz(filename: str, num_threads: int, program: str) -> None:
-    """Zip fastq files using parallel gzip (pigz) or gzip in-place."""
     if program == "pigz":
-        command = ["pigz", "-p", str(num_threads), filename]
+        command = ["pigz", "-p", str(num_threads), f"-{compresslevel}", "-c"]
     else:
-        command = ["gzip", filename]
+        command = ["gzip", f"-{compresslevel}", "-c"]
 
-    result = subprocess.run(command, capture_output=True, check=True)
-    log_subprocess_stderr(result.stderr, program)
+    with (
+        path.open("wb") as g,
+        subprocess.Popen(command, stdin=subprocess.PIPE, stdout=g, stderr=subprocess.PIPE) as proc,
+    ):
+        yield proc.stdin
+        proc.stdin.close()
+        _finish_gzip_process(proc, command, program)
 
 
-def run_cutadapt(
-    r1file: str,
-    r2file: str | None,
-    output_path: Path,
-    sample_name: str,
-    adapter_sequence: str,
-    mode: str,
-) -> tuple[str, str | None]:
-    """Run cutadapt to trim adapters."""
-    if adapter_sequence.lower() == "illumina":
-        adapter = "AGATCGGAAGAGC"
-    elif adapter_sequence.lower() == "nextera":
-        adapter = "CTGTCTCTTATA"
-    elif adapter_sequence.lower() == "small-rna":
-        adapter = "ATGGAATTCTCG"
-    else:
-        adapter = adapter_sequence.upper()
+@contextmanager
+def open_cutadapt_stream(r1file: str | Path, r2file: Optional[str | Path], adapter_sequence: str) -> Iterator[BinaryIO]:
+    """Trim adapters with cutadapt and read the trimmed reads from its stdout.
 
-    if mode == "single":
-        outfilename = str(output_path / f"{sample_name}_trimmed.fastq")
-        command = ["cutadapt", "-a", adapter, "-o", outfilename, "-O", "3", "-m", "20", r1file]
-        outfile1 = outfilename
-        outfile2 = None
+    The trimmed reads are not written to disk. Paired-end reads are written
+    interleaved (R1, R2, R1, ...) to a single stream, so that neither read file can
+    block cutadapt while the other one is being read.
+
+    Args:
+        r1file: Path to the R1 FASTQ file (plain or gzipped).
+        r2file: Path to the R2 FASTQ file, or None for single-end reads.
+        adapter_sequence: Adapter sequence, or "illumina", "nextera" or "small-rna".
+
+    Yields:
+        Binary stream with the trimmed FASTQ records.
+    """
+    adapter = _ADAPTER_PRESETS.get(adapter_sequence.lower(), adapter_sequence.upper())
+
+    if r2file is None:
+        command = ["cutadapt", "-a", adapter, "-O", "3", "-m", "20", "-o", "-", str(r1file)]
     else:
-        outfile1 = str(output_path / f"{sample_name}_R1_trimmed.fastq")
-        outfile2 = str(output_path / f"{sample_name}_R2_trimmed.fastq")
-        if r2file is None:
-            raise ValueError("r2file cannot be None in paired mode")
-        command = [
-            "cutadapt",
-            "-a",
-            adapter,
-            "-A",
-            adapter,
-            "-o",
-            outfile1,
-            "-p",
-            outfile2,
-            "-O",
-            "3",
-            "-m",
-            "20",
-            r1file,
-            r2file,
-        ]
+        command = ["cutadapt", "-a", adapter, "-A", adapter, "--interleaved"]
+        command += ["-O", "3", "-m", "20", "-o", "-", str(r1file), str(r2file)]
 
     logger.info(f"Performing adapter trimming using cutadapt with adapter sequence {adapter}")
-    result = subprocess.run(command, capture_output=True, check=True)
-    log_subprocess_stderr(result.stderr, "cutadapt")
-
-    # Clean up input files
-    Path(r1file).unlink()
-    if mode != "single" and r2file:
-        Path(r2file).unlink()
-
-    return outfile1, outfile2
-
-
-def preprocess_se(infilename: str, outfilename: str, barcode_length: int, spacer_length: int) -> int:
-    """Run the preprocessing for single end data (one fastq file)."""
-    with Path(infilename).open() as f, Path(outfilename).open("w") as g:
-        read_start = barcode_length + spacer_length
-        nseqs = 0
-        for name, seq, qual in read_fastq(f):
-            nseqs += 1
-            barcode = seq[:barcode_length]
-            # g.write(name+':'+barcode+'\n'+rest+'\n'+qualname+'\n'+qual[12+11:]+'\n')
-            parts = name.split()
-            newname = ":".join([parts[0], barcode]) + " " + parts[-1]
-            g.write("\n".join([newname, seq[read_start:], "+", qual[read_start:]]) + "\n")
-    return nseqs
+    tail: deque[str] = deque(maxlen=50)
+    with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as proc:
+        # Log stderr from a thread, so that a full stderr pipe cannot block cutadapt
+        stderr = io.TextIOWrapper(proc.stderr, errors="replace")
+        stderr_logger = threading.Thread(target=log_subprocess_stream, args=(stderr, "cutadapt", tail))
+        stderr_logger.start()
+        try:
+            yield proc.stdout
+            while proc.stdout.read(FASTQ_CHUNK_SIZE):
+                pass
+        except BaseException:
+            # stop cutadapt, so that its stderr is closed and the logging thread ends
+            proc.kill()
+            raise
+        finally:
+            stderr_logger.join()
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, command, stderr="\n".join(tail))
+
+
+def _move_umis_to_header(lines: list[bytes], barcodes: list[bytes], read_start: int, trim: bool = True) -> bytes:
+    """Rewrite a chunk of FASTQ records with the UMI barcodes appended to the read names.
 
+    Args:
+        lines: FASTQ lines without line endings, four per record.
+        barcodes: Barcode of each record.
+        read_start: Number of bases (barcode and spacer) trimmed from the start of each read.
+        trim: Whether to trim the reads, otherwise the sequence and quality are kept as is.
 
-def preprocess_pe(
-    r1file: str,
-    r2file: str,
-    outfile1: str,
-    outfile2: str,
-    barcode_length: int,
-    spacer_length: int,
-    dual_index: bool,
-) -> int:
-    """Run the preprocessing for paired end data (two fastq files)."""
-    read_start = barcode_length + spacer_length
-    with (
-        Path(r1file).open() as f1,
-        Path(r2file).open() as f2,
-        Path(outfile1).open("w") as g1,
-        Path(outfile2).open("w") as g2,
-    ):
-        nseqs = 0
-        for name1, seq1, qual1, name2, seq2, qual2 in read_fastq_paired_end(f1, f2):
-            nseqs += 1
-            if dual_index:
-                barcode = seq1[:barcode_length] + seq2[:barcode_length]
-            else:
-                barcode = seq1[:barcode_length]
-            parts1 = name1.split()
-            parts2 = name2.split()
-            newname1 = ":".join([parts1[0], barcode]) + " " + parts1[-1]
-            newname2 = ":".join([parts2[0], barcode]) + " " + parts2[-1]
-            g1.write("\n".join([newname1, seq1[read_start:], "+", qual1[read_start:]]) + "\n")
-            if dual_index:
-                g2.write("\n".join([newname2, seq2[read_start:], "+", qual2[read_start:]]) + "\n")
-            else:
-                g2.write("\n".join([newname2, seq2, "+", qual2]) + "\n")
-    return 2 * nseqs
+    Returns:
+        The rewritten records.
+    """
+    out = []
+    for name, barcode, seq, qual in zip(lines[0::4], barcodes, lines[1::4], lines[3::4]):
+        parts = name.split()
+        if trim:
+            seq = seq[read_start:]
+            qual = qual[read_start:]
+        out.append(b"%s:%s %s\n%s\n+\n%s\n" % (parts[0], barcode, parts[-1], seq, qual))
+    return b"".join(out)
 
 
-def prepare_input_files(
-    input_read1: Path,
-    input_read2: Optional[Path],
-    effective_mode: str,
-    tmpdir: str,
-    num_threads: int,
-    gziptool: str,
-) -> tuple[str, Optional[str], bool]:
-    """Unzip input files if necessary.
+def _preprocess_se_chunk(chunk: bytes, barcode_length: int, read_start: int) -> tuple[int, bytes]:
+    """Move the UMIs to the read names for a chunk of single end reads.
+
+    Returns:
+        Tuple of (number of reads, rewritten records).
+    """
+    lines = chunk.splitlines()
+    barcodes = [seq[:barcode_length] for seq in lines[1::4]]
+    return len(barcodes), _move_umis_to_header(lines, barcodes, read_start)
+
+
+def _preprocess_pe_chunk(
+    chunk: tuple[bytes, bytes], barcode_length: int, read_start: int, dual_index: bool
+) -> tuple[int, bytes, bytes]:
+    """Move the UMIs to the read names for a chunk of read pairs.
+
+    Returns:
+        Tuple of (number of read pairs, rewritten R1 records, rewritten R2 records).
+    """
+    lines1 = chunk[0].splitlines()
+    lines2 = chunk[1].splitlines()
+    if dual_index:
+        barcodes = [seq1[:barcode_length] + seq2[:barcode_length] for seq1, seq2 in zip(lines1[1::4], lines2[1::4])]
+    else:
+        barcodes = [seq1[:barcode_length] for seq1 in lines1[1::4]]
+    return (
+        len(barcodes),
+        _move_umis_to_header(lines1, barcodes, read_start),
+        _move_umis_to_header(lines2, barcodes, read_start, trim=dual_index),
+    )
+
+
+def _split_threads(num_threads: int, num_handles: int) -> tuple[int, int]:
+    """Split the threads between the (de)compression of the FASTQ files and the worker processes.
+
+    The (de)compression gets min(2, num_threads) threads shared by the open file handles,
+    but at least one per handle. The remaining threads are used for worker processes.
 
     Args:
-        input_read1: Path to first input file.
-        input_read2: Path to second input file (optional).
-        effective_mode: "single" or "paired".
-        tmpdir: Directory for temporary files.
-        num_threads: Number of threads for pigz.
-        gziptool: "pigz" or "gzip".
+        num_threads: Total number of threads.
+        num_handles: Number of FASTQ files that are read or written at the same time.
 
     Returns:
-        Tuple of (r1file path, r2file path, removerfiles flag).
+        Tuple of (threads per file handle, number of worker processes).
     """
-    if not str(input_read1).endswith("gz"):
-        r1file = str(input_read1)
-        removerfiles = False
-        r2file = str(input_read2) if input_read2 else None
+    compression_threads = min(2, num_threads)
+    handle_threads = max(1, compression_threads // num_handles)
+    return handle_threads, max(0, num_threads - handle_threads * num_handles)
 
-        if effective_mode == "paired" and not input_read2:
-            raise ValueError("Read2 not provided in paired mode")
-    else:
-        removerfiles = True
-        if effective_mode == "paired":
-            if not input_read2:
-                raise ValueError("Read2 not provided in paired mode")
-            r1file = run_unpigz(str(input_read1), tmpdir, num_threads, gziptool)
-            r2file = run_unpigz(str(input_read2), tmpdir, num_threads, gziptool)
+
+@contextmanager
+def _chunk_pool(num_workers: int) -> Iterator[Optional[Pool]]:
+    """Start a pool of worker processes, or yield None if there are too few workers to be worth it.
+
+    The pool must be started before any (de)compression pipes or logging threads are
+    opened, so that the forked workers do not inherit them.
+    """
+    if num_workers <= 1:
+        yield None
+        return
+    with Pool(num_workers) as p:
+        yield p
+
+
+def _map_chunks(func: Callable, chunks: Iterable, pool: Optional[Pool], num_workers: int) -> Iterator:
+    """Apply func to each chunk, keeping the order of the chunks.
+
+    Without a pool the chunks are processed in this process. Otherwise they are read in
+    batches of two per worker, so that the input is not read faster than it is processed.
+    """
+    if pool is None:
+        yield from map(func, chunks)
+        return
+    chunks = iter(chunks)
+    while batch := list(islice(chunks, 2 * num_workers)):
+        yield from pool.map(func, batch)
+
+
+def preprocess_se(
+    infilename: str | Path,
+    outfilename: str | Path,
+    barcode_length: int,
+    spacer_length: int,
+    num_threads: int = 1,
+    gziptool: str = "gzip",
+    adapter_sequence: Optional[str] = None,
+    gzip_level: int = DEFAULT_GZIP_LEVEL,
+) -> int:
+    """Run the preprocessing for single end data (one fastq file).
+
+    Gzipped input is decompressed and output ending with .gz is compressed on the fly.
+    If adapter_sequence is given, the reads are trimmed by cutadapt and read from its
+    output stream.
+    """
+    process_chunk = partial(
+        _preprocess_se_chunk, barcode_length=barcode_length, read_start=barcode_length + spacer_length
+    )
+    handle_threads, num_workers = _split_threads(num_threads, 2)
+    nseqs = 0
+    with ExitStack() as stack:
+        pool = stack.enter_context(_chunk_pool(num_workers))
+        if adapter_sequence:
+            f = stack.enter_context(open_cutadapt_stream(infilename, None, adapter_sequence))
         else:
-            r1file = run_unpigz(str(input_read1), tmpdir, num_threads, gziptool)
-            r2file = None
+            f = stack.enter_context(open_fastq_stream(infilename, handle_threads, gziptool))
+        g = stack.enter_context(open_fastq_output(outfilename, handle_threads, gziptool, gzip_level))
+        for n, out in _map_chunks(process_chunk, read_fastq_chunks(f), pool, num_workers):
+            nseqs += n
+            g.write(out)
+    return nseqs
+
+
+def preprocess_pe(
+    r1file: str | Path,
+    r2file: str | Path,
+    outfile1: str | Path,
+    outfile2: str | Path,
+    barcode_length: int,
+    spacer_length: int,
+    dual_index: bool,
+    num_threads: int = 1,
+    gziptool: str = "gzip",
+    adapter_sequence: Optional[str] = None,
+    gzip_level: int = DEFAULT_GZIP_LEVEL,
+) -> int:
+    """Run the preprocessing for paired end data (two fastq files).
 
-    return r1file, r2file, removerfiles
+    Gzipped input is decompressed and output ending with .gz is compressed on the fly.
+    If adapter_sequence is given, the reads are trimmed by cutadapt and read from its
+    interleaved output stream.
+    """
+    process_chunk = partial(
+        _preprocess_pe_chunk,
+        barcode_length=barcode_length,
+        read_start=barcode_length + spacer_length,
+        dual_index=dual_index,
+    )
+    handle_threads, num_workers = _split_threads(num_threads, 4)
+    nseqs = 0
+    with ExitStack() as stack:
+        pool = stack.enter_context(_chunk_pool(num_workers))
+        if adapter_sequence:
+            f = stack.enter_context(open_cutadapt_stream(r1file, r2file, adapter_sequence))
+            chunks = read_fastq_chunks_interleaved(f)
+        else:
+            f1 = stack.enter_context(open_fastq_stream(r1file, handle_threads, gziptool))
+            f2 = stack.enter_context(open_fastq_stream(r2file, handle_threads, gziptool))
+            chunks = read_fastq_chunks_paired_end(f1, f2)
+        g1 = stack.enter_context(open_fastq_output(outfile1, handle_threads, gziptool, gzip_level))
+        g2 = stack.enter_context(open_fastq_output(outfile2, handle_threads, gziptool, gzip_level))
+        for n, out1, out2 in _map_chunks(process_chunk, chunks, pool, num_workers):
+            nseqs += n
+            g1.write(out1)
+            g2.write(out2)
+    return 2 * nseqs
 
 
 def process_umi_extraction(
-    r1file: str,
-    r2file: Optional[str],
+    r1file: Path,
+    r2file: Optional[Path],
     effective_mode: str,
     config: PreprocessConfig,
-    removerfiles: bool,
-    tmpdir: str,
+    adapter_sequence: Optional[str] = None,
 ) -> tuple[list[str], int]:
-    """Extract UMIs and cleanup temporary files.
+    """Extract UMIs and write gzipped FASTQ files with the UMIs in the read names.
 
     Args:
-        r1file: Path to R1 file (unzipped).
-        r2file: Path to R2 file (unzipped, optional).
+        r1file: Path to R1 file (plain or gzipped).
+        r2file: Path to R2 file (plain or gzipped, optional).
         effective_mode: "single" or "paired".
         config: Preprocess config.
-        removerfiles: Whether to remove input files after processing.
-        tmpdir: Temporary directory path.
+        adapter_sequence: Adapter to trim with cutadapt before extracting the UMIs, if any.
 
     Returns:
         Tuple of (list of output FASTQ files, number of sequences).
     """
-    output_path = Path(config.output_path)
+    output_path = config.output_path
 
     if effective_mode == "single":
-        outfilename = str(output_path / f"{config.sample_name}_umis_in_header.fastq")
-        nseqs = preprocess_se(r1file, outfilename, config.umi_length, config.spacer_length)
-        run_pigz(outfilename, config.num_threads, config.gziptool)
-
-        if removerfiles:
-            Path(r1file).unlink()
-        Path(tmpdir).rmdir()
-        fastqfiles = [f"{outfilename}.gz"]
+        outfilename = str(output_path / f"{config.sample_name}_umis_in_header.fastq.gz")
+        nseqs = preprocess_se(
+            r1file,
+            outfilename,
+            config.umi_length,
+            config.spacer_length,
+            config.num_threads,
+            config.gziptool,
+            adapter_sequence,
+            config.gzip_level,
+        )
+        fastqfiles = [outfilename]
 
     else:
         if r2file is None:
@@ -389,14 +546,12 @@ def process_umi_extraction(
 
         if config.reverse_index:
             # switch forward and reverse read
-            r1filetmp = r1file
-            r1file = r2file
-            r2file = r1filetmp
-            outfile1 = str(output_path / f"{config.sample_name}_R2_umis_in_header.fastq")
-            outfile2 = str(output_path / f"{config.sample_name}_R1_umis_in_header.fastq")
+            r1file, r2file = r2file, r1file
+            outfile1 = str(output_path / f"{config.sample_name}_R2_umis_in_header.fastq.gz")
+            outfile2 = str(output_path / f"{config.sample_name}_R1_umis_in_header.fastq.gz")
         else:
-            outfile1 = str(output_path / f"{config.sample_name}_R1_umis_in_header.fastq")
-            outfile2 = str(output_path / f"{config.sample_name}_R2_umis_in_header.fastq")
+            outfile1 = str(output_path / f"{config.sample_name}_R1_umis_in_header.fastq.gz")
+            outfile2 = str(output_path / f"{config.sample_name}_R2_umis_in_header.fastq.gz")
 
         nseqs = preprocess_pe(
             r1file,
@@ -406,18 +561,12 @@ def process_umi_extraction(
             config.umi_length,
             config.spacer_length,
             config.dual_index,
+            config.num_threads,
+            config.gziptool,
+            adapter_sequence,
+            config.gzip_level,
         )
-        run_pigz(outfile1, config.num_threads, config.gziptool)
-        run_pigz(outfile2, config.num_threads, config.gziptool)
-
-        r1path = Path(r1file)
-        r2path = Path(r2file)
-        if removerfiles and r1path.is_file():
-            r1path.unlink()
-        if removerfiles and r2path.is_file():
-            r2path.unlink()
-        Path(tmpdir).rmdir()
-        fastqfiles = [outfile1 + ".gz", outfile2 + ".gz"]
+        fastqfiles = [outfile1, outfile2]
 
     return fastqfiles, nseqs
 
@@ -500,37 +649,15 @@ def run_preprocessing(config: PreprocessConfig) -> tuple[list[str], int]:
     # Determine effective mode (may change from paired to single if fastp merged reads)
     effective_mode = "paired" if input_read2 else "single"
 
-    # Step 2: Setup temp directory
-    if config.tmpdir:
-        newtmpdir = generate_random_dir(str(config.tmpdir))
-    else:
-        newtmpdir = generate_random_dir(str(config.output_path))
-
-    # Step 3: Unzip input files (only reached if fastp didn't handle UMI extraction)
-    r1file, r2file, removerfiles = prepare_input_files(
-        input_read1, input_read2, effective_mode, newtmpdir, config.num_threads, config.gziptool
-    )
-
     logger.info(f"Writing output files to {config.output_path}")
 
-    # Step 4: Optional cutadapt (only if adapter trimming requested and fastp didn't handle it)
+    # Step 2: Optional cutadapt (only if adapter trimming requested and fastp didn't handle it),
+    # the trimmed reads are streamed straight into the UMI extraction
+    adapter_sequence = None
     if config.adapter_trimming is True and not fastp_trimmed_adapters:
         if config.sample_name is None:
             raise ValueError("Sample name must be provided for adapter trimming")
-        output_path = Path(config.output_path)
-        r2_input = r2file if effective_mode == "paired" else None
-        r1file, r2file_out = run_cutadapt(
-            r1file,
-            r2_input,
-            output_path,
-            config.sample_name,
-            config.adapter_sequence,
-            effective_mode,
-        )
-        if effective_mode == "paired":
-            if r2file_out is None:
-                raise ValueError("Cutadapt returned None for R2 in paired mode")
-            r2file = r2file_out
+        adapter_sequence = config.adapter_sequence
 
-    # Step 5: UMI extraction
-    return process_umi_extraction(r1file, r2file, effective_mode, config, removerfiles, newtmpdir)
+    # Step 3: UMI extraction, gzipped input is decompressed on the fly
+    return process_umi_extraction(input_read1, input_read2, effective_mode, config, adapter_sequence)
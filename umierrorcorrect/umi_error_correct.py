@@ -8,7 +8,7 @@ import tempfile
 from collections.abc import Iterable
 from multiprocessing import Pool, cpu_count
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import pysam
 
@@ -25,9 +25,12 @@ from umierrorcorrect.core.get_cons_info import calc_major_nonref_allele_frequenc
 from umierrorcorrect.core.get_regions_from_bed import merge_regions, read_bed, sort_regions
 from umierrorcorrect.core.group import read_bam_from_bed, read_bam_from_tag, readBam
 from umierrorcorrect.core.logging_config import get_logger
-from umierrorcorrect.core.umi_cluster import cluster_barcodes, get_connected_components, merge_clusters
+from umierrorcorrect.core.umi_cluster import get_clusters, merge_clusters
 from umierrorcorrect.models.models import UMIErrorCorrectConfig
 
+if TYPE_CHECKING:
+    from umierrorcorrect.get_consensus_statistics import RegionConsensusStats
+
 logger = get_logger(__name__)
 
 # Column indices for consensus file parsing
@@ -70,8 +73,7 @@ def cluster_consensus_worker(args: tuple) -> None:
     indel_frequency_cutoff = float(indel_frequency_cutoff)
     consensus_frequency_cutoff = float(consensus_frequency_cutoff)
     # UMI clustering
-    adj_matrix = cluster_barcodes(umi_dict, edit_distance_threshold)
-    clusters = get_connected_components(umi_dict, adj_matrix)
+    clusters = get_clusters(umi_dict, edit_distance_threshold)
     umis = merge_clusters(umi_dict, clusters)
 
     # Consensus sequence generation
@@ -406,12 +408,26 @@ def cluster_umis_all_regions(
     i = 0
     j = 0
 
+    # Regions with more than 100000 reads are clustered up front to split them into
+    # chunks. Cluster all of them in parallel before building the per-region jobs.
+    large_regions = [
+        umi_dict
+        for contig_regions in regions.values()
+        for umi_dict in contig_regions.values()
+        if sum(umi_dict.values()) > 100000
+    ]
+    large_clusters = iter([])
+    if large_regions:
+        with Pool(int(num_cpus)) as p:
+            large_clusters = iter(p.starmap(get_clusters, [(x, edit_distance_threshold) for x in large_regions]))
+
     for contig in regions:
         for pos in regions[contig]:
             annotations = bedregions.get(contig, [])
 
             if region_from_tag:
                 i = pos
+                chunk_prefix = f"{pos}_"
                 posx = int(starts[contig][pos])
                 j = 0
             else:
@@ -420,8 +436,7 @@ def cluster_umis_all_regions(
             numreads = sum(regions[contig][pos].values())
             if numreads > 100000:  # split in chunks
                 umi_dict = regions[contig][pos]
-                adj_matrix = cluster_barcodes(umi_dict, edit_distance_threshold)
-                clusters = get_connected_components(umi_dict, adj_matrix)
+                clusters = next(large_clusters)
                 newdicts = split_into_chunks(umi_dict, clusters)
                 for x in newdicts:
                     tmpfilename = f"{output_path}/tmp_{i}.bam"  # noqa: S108
@@ -449,7 +464,7 @@ def cluster_umis_all_regions(
                     if not region_from_tag:
                         i += 1
                     else:
-                        i = i + "_" + str(j)
+                        i = chunk_prefix + str(j)
                         j += 1
             else:
                 argvec.append(
@@ -476,9 +491,8 @@ def cluster_umis_all_regions(
                 if not region_from_tag:
                     i += 1
 
-    p = Pool(int(num_cpus))
-
-    p.map(cluster_consensus_worker, argvec)
+    with Pool(int(num_cpus)) as p:
+        p.map(cluster_consensus_worker, argvec)
     return bamfilelist
 
 
@@ -500,11 +514,14 @@ def cluster_umis_on_position(
         return (regions, ends)
 
 
-def run_umi_errorcorrect(config: UMIErrorCorrectConfig) -> None:
+def run_umi_errorcorrect(config: UMIErrorCorrectConfig) -> list[RegionConsensusStats]:
     """Run UMI clustering and consensus read generation (error correction).
 
     Args:
         config: Configuration object containing all parameters for error correction.
+
+    Returns:
+        Consensus statistics per region, read from the consensus BAM for the stats file.
     """
     logger.info("Starting UMI clustering")
 
@@ -629,13 +646,14 @@ def run_umi_errorcorrect(config: UMIErrorCorrectConfig) -> None:
     # Generate stats file from consensus BAM (single source of truth)
     from umierrorcorrect.get_consensus_statistics import get_stat, write_stats_file
 
-    stats = get_stat(consensus_bam, bed_file)
+    stats = get_stat(consensus_bam, bed_file, num_cpus)
     write_stats_file(stats, output_path, sample_name)
 
     logger.info(
         f"Consensus generation complete, output written to {output_path}/{sample_name}_consensus_reads.bam, "
         f"{output_path}/{sample_name}_cons.tsv"
     )
+    return stats
 
 
 def main(config: UMIErrorCorrectConfig) -> None: